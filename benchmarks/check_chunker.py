@@ -0,0 +1,74 @@
+import sys
+from utils.chunker import StructuredChunker, is_heading
+
+failures = []
+
+
+def check(name: str, ok: bool, detail: str = ''):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(name)
+
+
+# Lines of extracted PDF text and whether they are headings when they follow a finished sentence
+HEADINGS = [
+    ('3 Method', True),
+    ('2.1 Training Setup', True),
+    ('IV. RESULTS', True),
+    ('Related Work', True),
+    ('8 GPUs for 3 days, using Adam with', False),
+    ('12 Layers with 768 hidden units and', False),
+    ('2019 IEEE International Conference on Computer Vision', False),
+    ('100 Epochs', False),
+    ('We train the model for', False),
+]
+
+# A sentence wrapped before a line that starts with a count, then a short tail of the section
+# before the next heading
+PAGES = [
+    '1 Introduction\n'
+    + 'Transformers replaced recurrence in sequence models. ' * 12 + '\n'
+    + 'All models were trained on\n'
+    + '8 GPUs for 3 days, using Adam with\n'
+    + 'a learning rate of 0.001 and warmup.\n'
+    + 'This concludes the setup.\n'
+    + '2 Experiments\n'
+    + 'We evaluate on three benchmarks. ' * 80,
+]
+
+# The short tail of a section, merged with the next heading and its two sentences
+MERGED_PAGES = [
+    '1 Introduction\n'
+    + 'Transformers replaced recurrence in sequence models. ' * 16 + '\n'
+    + '2 Data\n'
+    + 'We use two corpora. Both are public and large.\n'
+    + '3 Training Setup\n'
+    + 'Models are trained with Adam. ' * 30,
+]
+
+
+def main():
+    '''Checks heading detection and section labels of the structured chunker on known PDF text patterns.'''
+    for line, expected in HEADINGS:
+        check(f'is_heading({line!r}) is {expected}', is_heading(line) == expected)
+    check('numbered headings need a finished sentence before them',
+          is_heading('2.1 Training Setup') and not is_heading('2.1 Training Setup', after_sentence_end=False))
+    check('well-known section names are headings anywhere', is_heading('References', after_sentence_end=False))
+
+    chunks = list(StructuredChunker(target_tokens=120, max_tokens=200, min_tokens=60).split(PAGES))
+    sections = [chunk['section'] for chunk in chunks]
+    check('a wrapped line starting with a count does not start a section',
+          set(sections) == {'1 Introduction', '2 Experiments'}, str(sorted(set(sections))))
+    wrapped = next((c for c in chunks if 'All models were trained on' in c['text']), None)
+    check('a wrapped sentence stays in one chunk',
+          wrapped is not None and '8 GPUs for 3 days, using Adam with a learning rate' in wrapped['text'])
+
+    chunks = list(StructuredChunker(target_tokens=200, max_tokens=300, min_tokens=60).split(MERGED_PAGES))
+    merged = next(c for c in chunks if 'We use two corpora.' in c['text'])
+    check('a merged chunk is labelled with the section most of its text belongs to',
+          merged['section'] == '1 Introduction', merged['section'])
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.stub_server import StubServer
+
+# Started before the tools are imported, since they read their endpoints and cache path at import
+server = StubServer(latency=0.2).start()
+os.environ['SERPAPI_BASE_URL'] = server.url
+os.environ['ARXIV_API_URL'] = f'{server.url}/api/query'
+os.environ['SERP_API_KEY'] = 'stub'
+os.environ['SEARCH_PROVIDER'] = 'live'
+os.environ['TOOL_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='tool-cache-check-'), 'results.sqlite')
+
+from tools.fetch_arxiv import fetch_arxiv
+from tools.web_search import web_search
+from utils.tool_cache import tool_cache
+
+failures = []
+
+
+def check(name: str, ok: bool, detail: str = ''):
+    print(f"{'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(name)
+
+
+def main():
+    '''Runs web_search and fetch_arxiv against the stub server and checks the cache, TTL, coalescing and retries.'''
+    result = web_search.invoke({'query': 'graph neural networks'})
+    check('web_search parses results', result.startswith('Result 0 for graph neural networks'), result.splitlines()[0])
+    start = time.perf_counter()
+    web_search.invoke({'query': 'graph neural networks'})
+    elapsed = time.perf_counter() - start
+    check('repeated search is served from the cache', server.hits['/search.json'] == 1 and elapsed < 0.1,
+          f"{server.hits['/search.json']} requests, {elapsed * 1000:.0f}ms")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outputs = list(pool.map(lambda _: web_search.invoke({'query': 'diffusion models'}), range(8)))
+    check('concurrent identical searches are coalesced into one request',
+          server.hits['/search.json'] == 2 and len(set(outputs)) == 1 and tool_cache.coalesced >= 1,
+          f"{server.hits['/search.json'] - 1} request(s), {tool_cache.coalesced} coalesced")
+
+    tool_cache.ttls['web_search'] = 0.5
+    web_search.invoke({'query': 'short lived'})
+    time.sleep(0.6)
+    web_search.invoke({'query': 'short lived'})
+    check('expired entries are fetched again', server.hits['/search.json'] == 4, f"{server.hits['/search.json']} requests")
+
+    result = web_search.invoke({'query': 'flaky query'})
+    check('a 503 is retried', result.startswith('Result 0 for flaky query') and server.hits['/search.json'] == 6,
+          f"{server.hits['/search.json']} requests")
+
+    abstract = fetch_arxiv.invoke({'arxiv_id': 'https://arxiv.org/abs/2108.11510'})
+    check('fetch_arxiv resolves an abs URL', 'Title: Stub paper 2108.11510' in abstract, abstract.splitlines()[0])
+    fetch_arxiv.invoke({'arxiv_id': '2108.11510'})
+    check('the same paper by bare id is served from the cache', server.hits['/api/query'] == 1,
+          f"{server.hits['/api/query']} requests")
+    missing = fetch_arxiv.invoke({'arxiv_id': 'missing.00001'})
+    check('unknown ids report a missing abstract', missing == 'Abstract not available.', missing)
+    fetch_arxiv.invoke({'arxiv_id': 'missing.00001'})
+    check('missing abstracts are not cached', server.hits['/api/query'] == 3, f"{server.hits['/api/query']} requests")
+
+    server.stop()
+    print(f"Cache stats: {tool_cache.stats()}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import hashlib
+import time
+import numpy as np
+from langchain_core.tools import tool
+from navigator.providers import fake_fetch_arxiv, fake_web_search
+
+
+class HashEmbeddingFunction:
+    '''Deterministic bag-of-words embedding (hashed terms), so benchmarks run without a model download.'''
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = np.zeros((len(input), self.dim), dtype=np.float32)
+        for i, text in enumerate(input):
+            for word in str(text).lower().split():
+                h = int(hashlib.md5(word.encode('utf-8')).hexdigest(), 16)
+                vectors[i, h % self.dim] += 1.0 if (h >> 64) & 1 else -1.0
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        return list(vectors)
+
+
+def make_fake_search_tools(latency: float = 0.0) -> dict:
+    '''Offline stand-ins for web_search and fetch_arxiv with a fixed simulated latency.'''
+    @tool('web_search')
+    def web_search(query: str) -> str:
+        '''Finds general knowledge information using a Google search.'''
+        time.sleep(latency)
+        return fake_web_search(query)
+
+    @tool('fetch_arxiv')
+    def fetch_arxiv(arxiv_id: str) -> str:
+        '''Fetches the abstract from an ArXiv paper given its ArXiv ID.'''
+        time.sleep(latency)
+        return fake_fetch_arxiv(arxiv_id)
+
+    return {'web_search': web_search, 'fetch_arxiv': fetch_arxiv}
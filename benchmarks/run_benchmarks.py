@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# The benchmarks run offline: no API keys are prompted for, and every store the imported modules
+# open (including the shared handler, tool cache and answer cache) lives in a directory private
+# to the run and removed at exit, so numbers are not skewed by earlier runs and the working
+# directory is left alone.
+WORK_DIR = tempfile.mkdtemp(prefix='research-bench-')
+atexit.register(shutil.rmtree, WORK_DIR, ignore_errors=True)
+os.environ.setdefault('GROQ_API_KEY', 'offline-benchmark')
+os.environ.setdefault('SERP_API_KEY', 'offline-benchmark')
+os.environ['EMBEDDING_CACHE_PATH'] = os.path.join(WORK_DIR, 'embeddings.sqlite')
+os.environ['ANSWER_CACHE_PATH'] = os.path.join(WORK_DIR, 'answers.sqlite')
+os.environ['CHECKPOINT_PATH'] = os.path.join(WORK_DIR, 'checkpoints.sqlite')
+os.environ['TOOL_CACHE_PATH'] = os.path.join(WORK_DIR, 'tool_cache.sqlite')
+os.environ['CHROMA_DB_PATH'] = os.path.join(WORK_DIR, 'shared_db')
+os.environ['PDF_CACHE_PATH'] = os.path.join(WORK_DIR, 'shared_pdf_cache')
+
+import numpy as np
+from langchain_core.tools import tool
+from benchmarks.fakes import HashEmbeddingFunction, make_fake_search_tools
+from benchmarks.synthetic import SyntheticCorpus, write_pdf
+from utils import model_registry
+
+
+def percentiles(latencies: list) -> dict:
+    return {
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'mean_ms': float(np.mean(latencies) * 1000),
+    }
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_sha() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_catalog(handler, paper_catalog) -> dict:
+    start = time.perf_counter()
+    rows = len(paper_catalog)
+    convert_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = handler.store_paper()
+    index_seconds = time.perf_counter() - start
+    return {
+        'papers': rows,
+        'convert_seconds': convert_seconds,
+        'index_seconds': index_seconds,
+        'papers_per_second': indexed / index_seconds if index_seconds else None,
+    }
+
+
+def bench_ingest(handler, corpus, pdf_papers: int) -> dict:
+    '''Chunk/embed/store throughput from page texts, and end to end from PDF files.'''
+    chunks = 0
+    start = time.perf_counter()
+    for paper in corpus.papers[pdf_papers:]:
+        chunks += handler.store_page_texts(paper['paper_id'], paper['pages'])['stored']
+    text_seconds = time.perf_counter() - start
+
+    pdf_dir = os.path.join(WORK_DIR, 'pdfs')
+    os.makedirs(pdf_dir, exist_ok=True)
+    pdf_chunks = 0
+    start = time.perf_counter()
+    for paper in corpus.papers[:pdf_papers]:
+        path = os.path.join(pdf_dir, f"{paper['paper_id']}.pdf")
+        write_pdf(path, paper['pages'])
+        pdf_chunks += handler.store_chunks(paper['paper_id'], path)['stored']
+    pdf_seconds = time.perf_counter() - start
+
+    # Re-ingesting unchanged papers should only cost hashing
+    start = time.perf_counter()
+    for paper in corpus.papers[pdf_papers:]:
+        handler.store_page_texts(paper['paper_id'], paper['pages'])
+    reingest_seconds = time.perf_counter() - start
+
+    text_papers = len(corpus.papers) - pdf_papers
+    return {
+        'text_papers': text_papers,
+        'text_chunks': chunks,
+        'chunks_per_paper': chunks / text_papers if text_papers else None,
+        'text_chunks_per_second': chunks / text_seconds if text_seconds else None,
+        'pdf_papers': pdf_papers,
+        'pdf_chunks': pdf_chunks,
+        'pdf_papers_per_second': pdf_papers / pdf_seconds if pdf_seconds else None,
+        'reingest_unchanged_papers_per_second': text_papers / reingest_seconds if reingest_seconds else None,
+    }
+
+
+def is_relevant(metadata: dict, paper_id: str, page: int) -> bool:
+    return metadata.get('paper_id') == paper_id and metadata.get('page') == page
+
+
+def bench_queries(handler, queries: list, k: int) -> dict:
+    '''Latency percentiles and recall@k against the page each query was planted in.'''
+    results = {}
+    searches = {
+        'hybrid_search': lambda q: handler.hybrid_search(q, top_k=k),
+        'hybrid_search_filtered': lambda q, paper_id=None: handler.hybrid_search(q, top_k=k, paper_id=paper_id),
+        # A second, vaguer sub-query (the common words only) must not drown out the precise one
+        'hybrid_search_subqueries': lambda q: handler.hybrid_search([q, ' '.join(q.split()[2:])], top_k=k),
+        'retrieve_batch': lambda q: handler.retrieve_batch([q], top_k=k),
+        'retrieve_batch_mmr': lambda q: handler.retrieve_batch([q], top_k=k, mmr=True),
+        'bm25_search': lambda q: handler.chunks_collection.get(
+            ids=[doc_id for doc_id, _ in handler.bm25.search(q, k)], include=['metadatas']
+        ),
+    }
+    for name, search in searches.items():
+        latencies, hits = [], 0
+        for query, paper_id, page in queries:
+            start = time.perf_counter()
+            found = search(query, paper_id=paper_id) if name.endswith('_filtered') else search(query)
+            latencies.append(time.perf_counter() - start)
+            hits += any(is_relevant(m, paper_id, page) for m in found['metadatas'])
+        results[name] = {f'recall@{k}': hits / len(queries), **percentiles(latencies)}
+    return results
+
+
+def bench_pipeline(handler, corpus, runs: int, tool_latency: float, llm_latency: float) -> dict:
+    '''Full graph runs on a scripted LLM: two parallel turns of lookups, then the final answer.'''
+    from tools.rag_search import format_rag_contexts
+    from tools.final_answer_tool import final_answer
+    from navigator.decision_pipeline import build_runnable, astream_run
+    from navigator.providers import ScriptedToolCallingModel
+
+    @tool('rag_search')
+    def rag_search(query: str) -> str:
+        '''Retrieves relevant research chunks based on the query.'''
+        return format_rag_contexts(handler.hybrid_search(query, top_k=8), paper_catalog=handler.catalog)
+
+    @tool('rag_search_filter')
+    def rag_search_filter(query: str, arxiv_id: str) -> str:
+        '''Retrieves relevant research chunks for the given query, filtering by a specific ArXiv ID.'''
+        results = handler.expand_context(handler.hybrid_search(query, top_k=6, paper_id=arxiv_id))
+        return format_rag_contexts(results, paper_catalog=handler.catalog)
+
+    tool_map = {
+        **make_fake_search_tools(tool_latency),
+        'rag_search': rag_search,
+        'rag_search_filter': rag_search_filter,
+        'final_answer': final_answer,
+    }
+    query, paper_id, _ = corpus.queries(1, seed=7)[0]
+    llm = ScriptedToolCallingModel(latency=llm_latency, script=[
+        [('rag_search', {'query': query}), ('web_search', {'query': query}), ('fetch_arxiv', {'arxiv_id': paper_id})],
+        [('rag_search_filter', {'query': query, 'arxiv_id': paper_id}), ('web_search', {'query': f'{query} survey'})],
+        [('final_answer', {
+            'introduction': 'Intro', 'research_steps': ['search'], 'main_body': 'Body',
+            'conclusion': 'Done', 'sources': ['https://example.org/0']
+        })],
+    ])
+    graph = build_runnable(llm=llm, tool_map=tool_map)
+
+    async def one_run(arxiv_id: str = None) -> dict:
+        steps = {}
+        initial_state = {'input': query, 'chat_history': [], 'intermediate_steps': []}
+        async for event in astream_run(initial_state, graph=graph, arxiv_id=arxiv_id):
+            if event['type'] == 'step':
+                steps.setdefault(event['node'], []).append(event['step_seconds'])
+            elif event['type'] == 'done':
+                return {'elapsed': event['elapsed'], 'steps': steps, 'trace': event['trace'], 'cached': event['cached']}
+
+    totals, per_node, spans = [], {}, {}
+    for _ in range(runs):
+        result = asyncio.run(one_run())
+        for entry in result['trace'].breakdown():
+            spans.setdefault(entry['name'], []).append(entry['total_ms'] / 1000)
+        totals.append(result['elapsed'])
+        for node, seconds in result['steps'].items():
+            per_node.setdefault(node, []).extend(seconds)
+
+    # The same question again about the same paper: the first run fills the answer cache
+    asyncio.run(one_run(arxiv_id=paper_id))
+    repeats = [asyncio.run(one_run(arxiv_id=paper_id)) for _ in range(runs)]
+    return {
+        'runs': runs,
+        'answer_cache_repeat': {
+            'hits': sum(bool(r['cached']) for r in repeats),
+            **percentiles([r['elapsed'] for r in repeats]),
+        },
+        'tool_latency_seconds': tool_latency,
+        'llm_latency_seconds': llm_latency,
+        'end_to_end': percentiles(totals),
+        'nodes': {node: percentiles(seconds) for node, seconds in per_node.items()},
+        'spans_per_run': {name: percentiles(seconds) for name, seconds in spans.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline ingest, retrieval and pipeline benchmarks on a synthetic corpus.')
+    parser.add_argument('--papers', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=4, help='Pages per paper')
+    parser.add_argument('--pdf-papers', type=int, default=20, help='Papers ingested through PDF files')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--pipeline-runs', type=int, default=5)
+    parser.add_argument('--tool-latency', type=float, default=0.2, help='Simulated latency of web_search/fetch_arxiv')
+    parser.add_argument('--llm-latency', type=float, default=0.3, help='Simulated latency of each LLM turn')
+    parser.add_argument('--vector-backend', default='chroma', choices=['chroma', 'numpy'])
+    parser.add_argument('--real-embeddings', action='store_true', help='Use the real embedding model instead of hashed terms')
+    parser.add_argument('--tracemalloc', action='store_true', help='Also report peak Python heap (slower)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='benchmarks/results')
+    args = parser.parse_args()
+
+    if not args.real_embeddings:
+        model_registry.register_model(model_registry.DEFAULT_MODEL_ID, HashEmbeddingFunction)
+    # Imported after the model registration, since the handler binds its embedding function at import
+    from utils.catalog import PaperCatalog
+    from utils.chromadb_handler import ChromaDBHandler
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    corpus = SyntheticCorpus(n_papers=args.papers, pages_per_paper=args.pages, seed=args.seed)
+    csv_path = os.path.join(WORK_DIR, 'catalog.csv')
+    corpus.write_catalog_csv(csv_path)
+    paper_catalog = PaperCatalog(csv_path=csv_path, store_dir=os.path.join(WORK_DIR, 'catalog_store'))
+    handler = ChromaDBHandler(
+        persist_directory=os.path.join(WORK_DIR, 'db'),
+        pdf_cache_dir=os.path.join(WORK_DIR, 'pdf_cache'),
+        vector_backend=args.vector_backend,
+        paper_catalog=paper_catalog
+    )
+
+    results = {
+        'params': vars(args),
+        'git_sha': git_sha(),
+        'catalog': bench_catalog(handler, paper_catalog),
+        'ingest': bench_ingest(handler, corpus, min(args.pdf_papers, args.papers)),
+        'retrieval': bench_queries(handler, corpus.queries(args.queries, seed=args.seed + 1), args.k),
+        'pipeline': bench_pipeline(handler, corpus, args.pipeline_runs, args.tool_latency, args.llm_latency),
+        'embedding_cache': model_registry.load_metrics(),
+    }
+    results['memory'] = {'peak_rss_mb': peak_rss_mb()}
+    if args.tracemalloc:
+        results['memory']['peak_python_heap_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    out = os.path.join(args.out_dir, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{results['git_sha']}.json")
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps({key: results[key] for key in ('catalog', 'ingest', 'retrieval', 'memory')}, indent=2))
+    print(f"✅ Results written to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+
+def serp_results(query: str) -> dict:
+    return {'organic_results': [
+        {'title': f'Result {i} for {query}', 'snippet': f'Snippet {i} about {query}.', 'link': f'https://example.org/{i}'}
+        for i in range(3)
+    ]}
+
+
+def atom_feed(arxiv_ids: list) -> str:
+    entries = []
+    for arxiv_id in arxiv_ids:
+        if arxiv_id.startswith('missing'):
+            # What the export API returns for an id it does not know
+            entries.append('<entry><id>http://arxiv.org/api/errors#incorrect_id_format</id></entry>')
+            continue
+        versioned = arxiv_id if 'v' in arxiv_id.split('.')[-1] else f'{arxiv_id}v1'
+        entries.append(
+            f'<entry><id>http://arxiv.org/abs/{escape(versioned)}</id>'
+            f'<title>Stub paper {escape(arxiv_id)}</title>'
+            f'<summary>Stub abstract of {escape(arxiv_id)}.</summary>'
+            '<author><name>Ada Lovelace</name></author><author><name>Alan Turing</name></author>'
+            '<published>2021-08-25T00:00:00Z</published><updated>2021-08-25T00:00:00Z</updated>'
+            f'<link title="pdf" href="http://arxiv.org/pdf/{escape(versioned)}"/></entry>'
+        )
+    return f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">{"".join(entries)}</feed>'
+
+
+class StubServer:
+    '''
+    Local stand-in for SerpAPI (/search.json) and the arXiv export API (/api/query), for running
+    web_search and fetch_arxiv offline. Point the tools at it with SERPAPI_BASE_URL=url and
+    ARXIV_API_URL=url/api/query.
+
+    Every request is counted in `hits` by path, so callers can tell cache hits from requests.
+    Each response waits `latency` seconds. A search query starting with "flaky" fails once
+    with HTTP 503, then succeeds, to exercise retries.
+    '''
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.hits = Counter()
+        self._failed = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                with stub._lock:
+                    stub.hits[parsed.path] += 1
+                    fail = parsed.path == '/search.json' and params.get('q', '').startswith('flaky') \
+                        and params['q'] not in stub._failed
+                    if fail:
+                        stub._failed.add(params['q'])
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if fail:
+                    return self._send(503, 'text/plain', 'Service Unavailable')
+                if parsed.path == '/search.json':
+                    return self._send(200, 'application/json', json.dumps(serp_results(params.get('q', ''))))
+                if parsed.path == '/api/query':
+                    ids = [i for i in params.get('id_list', '').split(',') if i]
+                    return self._send(200, 'application/atom+xml', atom_feed(ids))
+                self._send(404, 'text/plain', 'Not Found')
+
+            def _send(self, status: int, content_type: str, body: str):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self) -> 'StubServer':
+        '''Serves in a background thread.'''
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve stand-ins for SerpAPI and the arXiv export API.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each response')
+    args = parser.parse_args()
+    server = StubServer(port=args.port, latency=args.latency)
+    print(f"✅ Stub server on {server.url}; run the app with:")
+    print(f"   SERPAPI_BASE_URL={server.url} ARXIV_API_URL={server.url}/api/query SERP_API_KEY=stub")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,145 @@
+import csv
+import random
+import string
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    '''Pronounceable pseudo-words, so term statistics look like text rather than noise.'''
+    consonants, vowels = 'bcdfghklmnprstvz', 'aeiou'
+    words = set()
+    while len(words) < size:
+        length = rng.randint(2, 4)
+        words.add(''.join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+class SyntheticCorpus:
+    '''
+    Deterministic synthetic papers, split into pages, plus queries with known answers.
+
+    Word frequencies follow a Zipf-like distribution. Every page carries a short run of rare
+    marker terms of its own, and each query is built from two of one page's markers plus
+    common words, so that page is the relevant result for recall@k.
+    '''
+    def __init__(self, n_papers: int = 200, pages_per_paper: int = 4, words_per_page: int = 400,
+                 vocab_size: int = 5000, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.vocab = make_vocabulary(vocab_size, self.rng)
+        self.weights = [1.0 / (rank + 1) for rank in range(vocab_size)]
+        self.papers = []
+        for p in range(n_papers):
+            paper_id = f"2501.{p:05d}v1"
+            pages, markers = [], []
+            for page in range(pages_per_paper):
+                page_markers = [self._marker() for _ in range(3)]
+                words = self.rng.choices(self.vocab, weights=self.weights, k=words_per_page)
+                # Kept together, so they land in the same chunk
+                position = self.rng.randrange(len(words))
+                words[position:position] = page_markers
+                pages.append(self._page_text(page, words))
+                markers.append(page_markers)
+            self.papers.append({
+                'paper_id': paper_id,
+                'title': ' '.join(self.rng.choices(self.vocab[:500], k=6)).title(),
+                'summary': self._sentences(self.rng.choices(self.vocab, weights=self.weights, k=80)),
+                'authors': ', '.join(' '.join(self.rng.choices(self.vocab, k=2)).title() for _ in range(3)),
+                'pages': pages,
+                'markers': markers,
+            })
+
+    def _marker(self) -> str:
+        return 'x' + ''.join(self.rng.choices(string.ascii_lowercase + string.digits, k=7))
+
+    def _sentences(self, words: list) -> str:
+        out, sentence = [], []
+        for word in words:
+            sentence.append(word)
+            if len(sentence) >= self.rng.randint(8, 20):
+                out.append(' '.join(sentence).capitalize() + '.')
+                sentence = []
+        if sentence:
+            out.append(' '.join(sentence).capitalize() + '.')
+        return ' '.join(out)
+
+    def _page_text(self, page: int, words: list, line_chars: int = 90) -> str:
+        '''A section heading, then the text wrapped into lines, like extracted PDF text.'''
+        lines, line = [f"{page + 1} {' '.join(self.rng.choices(self.vocab[:300], k=2)).title()}"], ''
+        for word in self._sentences(words).split():
+            if line and len(line) + len(word) + 1 > line_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}".strip()
+        lines.append(line)
+        return '\n'.join(lines)
+
+    def queries(self, n: int, seed: int = 1) -> list:
+        '''Returns [(query, paper_id, page_number)], each query targeting one page.'''
+        rng = random.Random(seed)
+        result = []
+        for _ in range(n):
+            paper = rng.choice(self.papers)
+            page = rng.randrange(len(paper['pages']))
+            words = rng.sample(paper['markers'][page], 2) + rng.choices(self.vocab[:50], k=3)
+            result.append((' '.join(words), paper['paper_id'], page))
+        return result
+
+    def write_catalog_csv(self, path: str):
+        '''Writes the papers in the final_data.csv layout.'''
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['entry_id', 'published_year', 'authors', 'pdf_url', 'title', 'summary'])
+            for paper in self.papers:
+                writer.writerow([
+                    f"http://arxiv.org/abs/{paper['paper_id']}", 2025, paper['authors'],
+                    f"http://arxiv.org/pdf/{paper['paper_id']}", paper['title'], paper['summary']
+                ])
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: str, pages: list, line_chars: int = 90, lines_per_page: int = 60):
+    '''Writes a minimal, valid text PDF (Helvetica, one content stream per page) without extra dependencies.'''
+    page_streams = []
+    for text in pages:
+        words, lines, line = text.split(), [], ''
+        for word in words:
+            if len(line) + len(word) + 1 > line_chars:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}".strip()
+        lines.append(line)
+        for start in range(0, len(lines), lines_per_page):
+            body = ' T* '.join(f"({_pdf_escape(l)}) Tj" for l in lines[start:start + lines_per_page])
+            page_streams.append(f"BT /F1 10 Tf 12 TL 50 780 Td {body} ET".encode('latin-1', 'replace'))
+
+    n = len(page_streams)
+    page_ids = [4 + 2 * i for i in range(n)]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {n} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page_id, stream in zip(page_ids, page_streams):
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>"
+        ).encode()
+        objects[page_id + 1] = f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, 'wb') as f:
+        f.write(out)
@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+import chromadb
+from utils.vector_store import NumpyVectorStore, hnsw_metadata
+
+
+def make_vectors(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    '''Clustered unit vectors, which look more like sentence embeddings than uniform noise.'''
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, n)] + 0.35 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def measure(store, queries: np.ndarray, truth: list, k: int) -> dict:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(query_embeddings=[query.tolist()], n_results=k, include=['distances'])
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {int(i) for i in result['ids'][0]})
+    return {
+        f'recall@{k}': hits / (k * len(queries)),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+def run(n: int, dim: int, n_queries: int, k: int, batch: int = 2000) -> list:
+    corpus = make_vectors(n, dim, clusters=max(n // 200, 8))
+    queries = make_vectors(n_queries, dim, clusters=max(n // 200, 8), seed=1)
+    truth = exact_top_k(corpus, queries, k)
+    ids = [str(i) for i in range(n)]
+    results = []
+
+    for quantization, rerank_factors in ((None, [1]), ('int8', [1, 2, 4]), ('binary', [2, 4, 8, 16])):
+        with tempfile.TemporaryDirectory() as path:
+            store = NumpyVectorStore(path, quantization=quantization)
+            start = time.perf_counter()
+            for i in range(0, n, batch):
+                store.upsert(ids=ids[i:i + batch], embeddings=corpus[i:i + batch])
+            build_seconds = time.perf_counter() - start
+            for rerank_factor in rerank_factors:
+                store.rerank_factor = rerank_factor
+                results.append({
+                    'backend': 'numpy', 'quantization': quantization, 'rerank_factor': rerank_factor,
+                    'build_seconds': build_seconds, 'disk_bytes': dir_size(path),
+                    'memory_bytes': store._codes.nbytes + (store._scales.nbytes if store._scales is not None else 0)
+                    if quantization else corpus.nbytes,
+                    **measure(store, queries, truth, k),
+                })
+
+    for m in (16, 32):
+        for search_ef in (16, 64, 128):
+            with tempfile.TemporaryDirectory() as path:
+                client = chromadb.PersistentClient(path=path)
+                collection = client.create_collection(
+                    'bench', metadata=hnsw_metadata(space='cosine', m=m, construction_ef=128, search_ef=search_ef)
+                )
+                start = time.perf_counter()
+                for i in range(0, n, batch):
+                    collection.add(ids=ids[i:i + batch], embeddings=corpus[i:i + batch].tolist())
+                build_seconds = time.perf_counter() - start
+                results.append({
+                    'backend': 'chroma', 'hnsw_m': m, 'hnsw_search_ef': search_ef,
+                    'build_seconds': build_seconds, 'disk_bytes': dir_size(path),
+                    **measure(collection, queries, truth, k),
+                })
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recall vs latency of the vector store backends and settings.')
+    parser.add_argument('--n', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--out', default='benchmarks/results/vector_store.json')
+    args = parser.parse_args()
+
+    results = run(args.n, args.dim, args.queries, args.k)
+    for r in results:
+        print(json.dumps(r))
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump({'params': vars(args), 'results': results}, f, indent=2)
+    print(f"✅ Results written to {args.out}")
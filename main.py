@@ -1,14 +1,40 @@
 import streamlit as st
 import json
-from navigator.decision_pipeline import runnable, build_report
-from utils.chromadb_handler import chroma_db
 import os
-from langchain_core.agents import AgentAction
+import asyncio
+import threading
+import uuid
+
+# With RESEARCH_API_URL set, the page is a thin client of the research service (service/app.py)
+# and loads no models or indexes itself; otherwise it runs the pipeline in-process.
+RESEARCH_API_URL = os.getenv("RESEARCH_API_URL")
+if RESEARCH_API_URL:
+    from service.client import ResearchClient
+    api = ResearchClient(RESEARCH_API_URL)
+else:
+    api = None
+    from navigator.decision_pipeline import astream_run, can_resume, report_from_state, make_initial_state
+    from utils.chromadb_handler import chroma_db
+    from utils.ingest_queue import bulk_ingest
+    from utils.model_registry import warm_up, load_metrics
 
 # Set page configuration
 st.set_page_config(page_title="AI Research Assistant Navigator", layout="wide")
 st.title("AI Research Assistant Navigator")
 
+@st.cache_resource
+def start_model_warm_up():
+    """Loads the embedding model once per process, in the background, so the page renders right away."""
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
+
+if not api and os.getenv("WARM_UP_MODELS", "1") == "1":
+    start_model_warm_up()
+
+with st.sidebar.expander("Model load metrics"):
+    st.json(api.health()["models"] if api else load_metrics())
+
 st.markdown("""
 This app retrieves relevant research papers from a CSV dataset, downloads the selected paper, 
 stores it into ChromaDB, and then uses an AI Navigator to compile a final research report.
@@ -20,7 +46,10 @@ paper_query = st.text_input("Enter a research query to find relevant papers:", v
 
 if st.button("Retrieve Papers"):
     st.info("Searching for relevant papers...")
-    relevant_papers = chroma_db.retrieve_relevant_papers(query_text=paper_query, top_k=5)
+    if api:
+        relevant_papers = api.search_papers(paper_query, top_k=5)
+    else:
+        relevant_papers = chroma_db.retrieve_relevant_papers(query_text=paper_query, top_k=5)
 
     if relevant_papers:
         st.success(f"Found {len(relevant_papers)} relevant papers:")
@@ -34,7 +63,15 @@ selected_pdf_url = st.text_input("Enter the PDF URL of the paper to download:")
 selected_arxiv_id = st.text_input("Enter the ArXiv ID of the selected paper:")
 
 if st.button("Download and Store Paper"):
-    if selected_pdf_url and selected_arxiv_id:
+    if api and selected_pdf_url and selected_arxiv_id:
+        st.info("Downloading and storing the paper...")
+        job = api.wait(api.start_ingest(papers=[{"id": selected_arxiv_id, "pdf_url": selected_pdf_url}])["id"])
+        status = (job.get("result") or {}).get(selected_arxiv_id, {})
+        if status.get("status") == "done":
+            st.success(f"Paper chunks stored successfully! ({status['detail']})")
+        else:
+            st.error(f"Failed to store the paper: {status.get('detail') or job.get('error')}")
+    elif selected_pdf_url and selected_arxiv_id:
         st.info("Downloading paper PDF...")
         pdf_path = chroma_db.download_pdf(selected_pdf_url)
 
@@ -48,46 +85,161 @@ if st.button("Download and Store Paper"):
     else:
         st.error("Please provide both the PDF URL and the ArXiv ID.")
 
+# Bulk ingest runs in the background; each rerun of the page shows its latest progress.
+st.subheader("Bulk Ingest Papers for a Query")
+bulk_query = st.text_input("Enter a research query to ingest its top papers:", value=paper_query)
+bulk_top_k = st.number_input("Number of papers to ingest:", min_value=1, max_value=100, value=10)
+
+if st.button("Start Bulk Ingest"):
+    if api:
+        st.session_state['bulk_ingest_job'] = api.start_ingest(query=bulk_query, top_k=int(bulk_top_k))["id"]
+    else:
+        papers = chroma_db.retrieve_relevant_papers(query_text=bulk_query, top_k=int(bulk_top_k))
+        st.session_state['bulk_ingest_job'] = bulk_ingest(papers)
+
+def bulk_ingest_progress(bulk_job) -> tuple:
+    """Returns ({paper_id: {'status', 'detail'}}, finished) for a local job or a service job id."""
+    if not api:
+        return bulk_job.progress(), bulk_job.done()
+    progress = {}
+    for event in api.events(bulk_job):
+        progress[event["paper_id"]] = {"status": event["status"], "detail": event["detail"]}
+    return progress, api.job(bulk_job)["status"] in ("done", "failed")
+
+bulk_job = st.session_state.get('bulk_ingest_job')
+if bulk_job:
+    progress, bulk_done = bulk_ingest_progress(bulk_job)
+    finished = sum(v['status'] in ('done', 'failed') for v in progress.values())
+    st.progress(finished / max(len(progress), 1), text=f"{finished}/{len(progress)} papers processed")
+    st.table([{'paper_id': k, **v} for k, v in progress.items()])
+    if not bulk_done:
+        st.button("Refresh Progress")
+
 # ---- Step 3: Run Navigator with Final Query & Selected ArXiv ID ----
 st.header("Step 3: Generate Research Report via Navigator")
 final_query = st.text_input("Enter your final research query for the Navigator:", value="Summarize key insights from the paper")
 final_arxiv_id = st.text_input("Enter the ArXiv ID to be used by the Navigator:")
 
-if st.button("Run Navigator"):
-    st.info("Running Navigator Pipeline...")
+def describe_step(node: str, update: dict) -> str:
+    """Renders a node update from the streaming run as markdown."""
+    if node == "navigator":
+        calls = update.get("pending_calls") or []
+        return "\n".join(f"- requested `{a.tool}` with `{json.dumps(a.tool_input)}`" for a in calls) or "- no tool calls"
+    return "\n".join(
+        f"- `{action.tool}` → {output[:300]}{'...' if len(output) > 300 else ''}"
+        for action, output in update.get("intermediate_steps", [])
+    )
+
+async def stream_navigator(initial_state: dict, arxiv_id: str, thread_id: str, steps_area, token_placeholder) -> tuple:
+    """Consumes the streaming run, drawing each step and the live LLM output as they arrive."""
+    tokens = []
+    result_state = None
+    trace = None
+    cached = None
+    async for event in astream_run(initial_state, arxiv_id=arxiv_id or None, thread_id=thread_id):
+        if event["type"] == "token":
+            tokens.append(event["text"])
+            token_placeholder.code("".join(tokens)[-3000:])
+        elif event["type"] == "step":
+            tokens.clear()
+            token_placeholder.empty()
+            steps_area.markdown(
+                f"**{event['node']}** — {event['step_seconds']:.2f}s (total {event['elapsed']:.2f}s)\n"
+                + describe_step(event["node"], event["update"])
+            )
+        elif event["type"] == "done":
+            result_state = event["state"]
+            trace = event["trace"]
+            cached = event["cached"]
+    return result_state, trace, cached
+
+def run_navigator_remote(query: str, arxiv_id: str, steps_area, resume_job: str = None) -> dict:
+    """Runs the report as a service job (or resumes a failed one), drawing each step as the job reports it."""
+    def on_event(event):
+        calls = "\n".join(
+            f"- `{c['tool']}` " + (f"→ {c['output'][:300]}" if "output" in c else f"with `{json.dumps(c['tool_input'])}`")
+            for c in event["calls"]
+        )
+        steps_area.markdown(
+            f"**{event['node']}** — {event['step_seconds']:.2f}s (total {event['elapsed']:.2f}s)\n" + calls
+        )
+    started = api.resume_report(resume_job) if resume_job else api.start_report(query, arxiv_id)
+    job = api.wait(started["id"], on_event=on_event)
+    if job["status"] != "done":
+        st.session_state["failed_run"] = job["id"]
+        raise RuntimeError(job["error"])
+    return job["result"]
+
+def show_timing_breakdown(breakdown: list, trace=None):
+    """Shows where the run spent its time, per span name, with the raw spans for download."""
+    st.subheader("Timing Breakdown")
+    st.table([
+        {"span": e["name"], "count": e["count"], "total ms": round(e["total_ms"], 1), "max ms": round(e["max_ms"], 1)}
+        for e in breakdown
+    ])
+    if trace is None:
+        return
+    with st.expander("Spans"):
+        st.json(trace.to_json())
+    st.download_button(
+        "Download trace (OpenTelemetry JSON)",
+        json.dumps(trace.to_otel()),
+        file_name=f"trace-{trace.trace_id}.json",
+        mime="application/json"
+    )
+
+def show_cache_hit(cached: dict):
+    if cached:
+        st.info(f"Answered from cache: a similar question was asked before "
+                f"(\"{cached['query']}\", similarity {cached['similarity']:.2f}).")
+
+def run_navigator(resume_run: str = None):
+    """
+    Runs the navigator and shows its report. Every step is checkpointed, so when a run fails it
+    is kept in the session and can be resumed from its last finished step (resume_run).
+    """
+    st.info("Resuming Navigator Pipeline..." if resume_run else "Running Navigator Pipeline...")
+    st.session_state.pop("failed_run", None)
+    if api:
+        result = run_navigator_remote(final_query, final_arxiv_id, st.container(), resume_job=resume_run)
+        show_cache_hit(result["cached"])
+        st.success("Research Report Generated!")
+        st.text_area("Final Research Report", result["report"], height=500)
+        show_timing_breakdown(result["timing"])
+        return
+
+    thread_id = resume_run or uuid.uuid4().hex
+    initial_state = None if resume_run else make_initial_state(final_query, final_arxiv_id)
+    steps_area = st.container()
+    token_placeholder = st.empty()
     try:
-        initial_state = {
-            'input': final_query,
-            'chat_history': [],
-            'intermediate_steps': [
-                (AgentAction(tool="fetch_arxiv", tool_input={"input": final_arxiv_id}, log="TBD"), "")
-            ]
-        }
-
-        st.write("### DEBUG: Initial State:", initial_state)
-
-        result_state = runnable.invoke(initial_state)
-
-        if not result_state or 'intermediate_steps' not in result_state:
-            st.error("Navigator did not return expected results.")
-            st.stop()
-
-        st.write("### DEBUG: Result State:", result_state)
-
-        output = {
-            "introduction": "This report summarizes the research findings based on your query.",
-            "research_steps": [
-                f"{step[0].tool}: {json.dumps(step[0].tool_input, indent=2)} -> {step[1]}"
-                for step in result_state['intermediate_steps']
-            ],
-            "main_body": "Detailed insights are extracted from the selected paper and complementary web search results.",
-            "conclusion": "The research demonstrates the potential and breadth of current AI developments.",
-            "sources": ["ArXiv", "SerpAPI", "ChromaDB"]
-        }
-
-        report = build_report(output)
+        result_state, trace, cached = asyncio.run(
+            stream_navigator(initial_state, final_arxiv_id, thread_id, steps_area, token_placeholder)
+        )
+    except Exception:
+        if can_resume(thread_id):
+            st.session_state["failed_run"] = thread_id
+        raise
+    show_cache_hit(cached)
+
+    if not result_state or 'intermediate_steps' not in result_state:
+        st.error("Navigator did not return expected results.")
+    else:
         st.success("Research Report Generated!")
-        st.text_area("Final Research Report", report, height=500)
+        st.text_area("Final Research Report", report_from_state(result_state), height=500)
+        show_timing_breakdown(trace.breakdown(), trace)
 
+if st.button("Run Navigator"):
+    try:
+        run_navigator()
     except Exception as e:
         st.error(f"Error running Navigator: {e}")
+
+failed_run = st.session_state.get("failed_run")
+if failed_run:
+    st.warning("The last run failed. Resuming continues from its last finished step and keeps the tool results gathered so far.")
+    if st.button("Resume Failed Run"):
+        try:
+            run_navigator(resume_run=failed_run)
+        except Exception as e:
+            st.error(f"Error resuming Navigator: {e}")
@@ -1,12 +1,23 @@
 from langchain_core.messages import BaseMessage
 from langchain_core.agents import AgentAction
-from navigator.navigator import prompt, llm
+from navigator.navigator import prompt, get_llm
+from navigator.providers import provider_key
 from tools.rag_search import rag_search, rag_search_filter
 from tools.fetch_arxiv import fetch_arxiv
 from tools.web_search import web_search
 from tools.final_answer_tool import final_answer
+from navigator.scratchpad import Scratchpad
+from utils import tracing
+from utils.tracing import span, traced, start_trace
+from utils.answer_cache import answer_cache
+from utils import checkpoints
 from langgraph.graph import StateGraph, END
+import json
 import operator
+import time
+import uuid
+from functools import partial, lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypedDict, List, Annotated
 
 # Define the state type
@@ -14,61 +25,72 @@ class AgentState(TypedDict):
     input: str
     chat_history: List[BaseMessage]
     intermediate_steps: Annotated[List[tuple[AgentAction, str]], operator.add]
+    # Tool calls requested by the navigator in its latest turn, not yet executed
+    pending_calls: List[AgentAction]
+
+# Shared scratchpad renderer; keeps the prompt within a fixed token budget as sessions grow
+scratchpad = Scratchpad(token_budget=3000)
 
 # Helper function to create a scratchpad from intermediate steps
 def create_scratchpad(intermediate_steps: List[tuple[AgentAction, str]]) -> str:
-    research_steps = []
-    for action, log_output in intermediate_steps:  
-        if log_output != 'TBD':  
-            research_steps.append(
-                f"Tool: {action.tool}, Input: {action.tool_input}\nOutput: {log_output}"
-            )
-    return '\n---\n'.join(research_steps)
+    with span('scratchpad.render', steps=len(intermediate_steps)) as current:
+        rendered = scratchpad.render(intermediate_steps)
+        current.set(chars=len(rendered))
+        return rendered
 
 # Bind tools
 tools = [rag_search, rag_search_filter, fetch_arxiv, web_search, final_answer]
-navigator = (
-    {
-        'input': lambda x: x['input'],
-        'chat_history': lambda x: x['chat_history'],
-        'scratchpad': lambda x: create_scratchpad(intermediate_steps=x['intermediate_steps']),
-    }
-    | prompt
-    | llm.bind_tools(tools, tool_choice='any')
-)
 
-def run_navigator(state: dict) -> dict:
-    '''Runs the navigator and processes the output to extract tool information.'''
-    print('run_navigator')
-    print(f"Intermediate steps: {state.get('intermediate_steps')}")
+def build_navigator(llm):
+    '''Builds the navigator chain (scratchpad -> prompt -> LLM with tools bound) for an LLM.'''
+    return (
+        {
+            'input': lambda x: x['input'],
+            'chat_history': lambda x: x['chat_history'],
+            'scratchpad': lambda x: create_scratchpad(intermediate_steps=x['intermediate_steps']),
+        }
+        | prompt
+        | llm.bind_tools(tools, tool_choice='any')
+    )
 
-    out = navigator.invoke(state)
+def run_navigator(state: dict, navigator) -> dict:
+    '''Runs the navigator and queues every tool call it returns for execution.'''
+    with span('llm.navigator', steps=len(state.get('intermediate_steps', []))) as current:
+        out = navigator.invoke(state)
+        current.set(tool_calls=len(out.tool_calls or []), **token_counts(out))
 
     # Ensure tool_calls exist
     if not out.tool_calls:
         print("ERROR: No tool_calls returned by navigator!")
-        return state  
-
-    # Extract tool name and arguments correctly
-    tool_name = out.tool_calls[0]['name']  # ✅ Use dictionary access
-    tool_args = out.tool_calls[0]['args']
-
-    # ✅ Properly initialize AgentAction
-    action_out = AgentAction(tool=tool_name, tool_input=tool_args, log="TBD")
+        return {'pending_calls': []}
 
-    # Append to `intermediate_steps` correctly
+    # Keep every tool call of this turn, in the order the LLM returned them
     return {
-        'intermediate_steps': state.get('intermediate_steps', []) + [(action_out, "")]
+        'pending_calls': [
+            AgentAction(tool=call['name'], tool_input=call['args'], log="TBD")
+            for call in out.tool_calls
+        ]
     }
 
+def token_counts(message) -> dict:
+    '''Returns the prompt/completion token counts reported for an LLM response, if any.'''
+    usage = getattr(message, 'usage_metadata', None) or {}
+    if usage:
+        return {'input_tokens': usage.get('input_tokens', 0), 'output_tokens': usage.get('output_tokens', 0)}
+    usage = (getattr(message, 'response_metadata', None) or {}).get('token_usage') or {}
+    if usage:
+        return {'input_tokens': usage.get('prompt_tokens', 0), 'output_tokens': usage.get('completion_tokens', 0)}
+    return {}
+
 def router(state: dict) -> str:
-    '''Determines the next tool to use based on the current state.'''
-    if isinstance(state.get('intermediate_steps'), list) and state['intermediate_steps']:
-        last_action = state['intermediate_steps'][-1][0]  
-        return last_action.tool
-    else:
-        print('Router invalid format')
+    '''Determines the next node based on the tool calls queued by the navigator.'''
+    pending = state.get('pending_calls') or []
+    if not pending:
+        print('Router: no tool calls to run')
+        return END
+    if any(action.tool == 'final_answer' for action in pending):
         return 'final_answer'
+    return 'tools'
 
 tool_str_to_func = {
     'rag_search_filter': rag_search_filter,
@@ -78,24 +100,36 @@ tool_str_to_func = {
     'final_answer': final_answer
 }
 
-def run_tool(state: dict) -> dict:
-    '''Executes the appropriate tool based on the current state.'''
-    last_action = state['intermediate_steps'][-1][0]  
-
-    tool_name = last_action.tool
-    tool_args = last_action.tool_input
-    print(f"Running tool {tool_name} with input: {tool_args}")
+# Bounded pool shared by all runs, so concurrent sessions can't oversubscribe the tools
+MAX_TOOL_WORKERS = 4
+tool_executor = ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS, thread_name_prefix='tool')
 
-    out = tool_str_to_func[tool_name].invoke(**tool_args)  # ✅ Unpack dictionary
+def run_tool(action: AgentAction, tool_map: dict = tool_str_to_func) -> tuple:
+    '''Executes a single tool call and returns its (AgentAction, output) step.'''
+    with span(f'tool.{action.tool}', input_chars=len(str(action.tool_input))) as current:
+        try:
+            out = tool_map[action.tool].invoke(action.tool_input)
+        except Exception as e:
+            # One failing lookup should not discard the results of the others
+            out = f"Error running tool {action.tool}: {e}"
+            current.error = f"{type(e).__name__}: {e}"
+        current.set(output_chars=len(str(out)))
+    return (AgentAction(tool=action.tool, tool_input=action.tool_input, log="Tool executed"), str(out))
 
-    # ✅ Properly initialize AgentAction
-    action_out = (AgentAction(tool=tool_name, tool_input=tool_args, log="Tool executed"), str(out))
-
-    print("runned tool lol")  
+def run_tools(state: dict, tool_map: dict = tool_str_to_func) -> dict:
+    '''Executes all queued tool calls in parallel and records them in call order.'''
+    actions = state.get('pending_calls') or []
+    futures = [tracing.submit(tool_executor, run_tool, action, tool_map) for action in actions]
     return {
-        'intermediate_steps': state.get('intermediate_steps', []) + [action_out]
+        'intermediate_steps': [future.result() for future in futures],
+        'pending_calls': []
     }
 
+def run_final_answer(state: dict, tool_map: dict = tool_str_to_func) -> dict:
+    '''Executes the final_answer call; other calls queued in the same turn are dropped.'''
+    action = next(a for a in state['pending_calls'] if a.tool == 'final_answer')
+    return {'intermediate_steps': [run_tool(action, tool_map)], 'pending_calls': []}
+
 def build_report(output: dict) -> str:
     '''Builds a formatted report based on the navigator's output.'''
     research_steps = output.get('research_steps', "")
@@ -128,22 +162,164 @@ SOURCES
 {sources}
 """
 
-# Build the state graph
-graph = StateGraph(AgentState)
-graph.add_node('navigator', run_navigator)
-graph.add_node('rag_search_filter', run_tool)
-graph.add_node('rag_search', run_tool)
-graph.add_node('fetch_arxiv', run_tool)
-graph.add_node('web_search', run_tool)
-graph.add_node('final_answer', run_tool)
-
-graph.set_entry_point('navigator')
-graph.add_conditional_edges(source='navigator', path=router)
-
-# ✅ Fix `tool_obj.name`
-for tool_obj in tools:
-    if hasattr(tool_obj, 'name') and tool_obj.name != 'final_answer':  
-        graph.add_edge(tool_obj.name, 'navigator')
-
-graph.add_edge('final_answer', END)
-runnable = graph.compile()
+def report_from_state(state: dict) -> str:
+    '''Builds the report of a finished run from its final_answer call, or summarizes its steps if there is none.'''
+    final_steps = [s for s in state['intermediate_steps'] if s[0].tool == "final_answer"]
+    if final_steps:
+        # The final_answer call's arguments are the report the LLM wrote
+        return build_report(dict(final_steps[-1][0].tool_input))
+    return build_report({
+        "introduction": "This report summarizes the research findings based on your query.",
+        "research_steps": [
+            f"{step[0].tool}: {json.dumps(step[0].tool_input, indent=2)} -> {step[1]}"
+            for step in state['intermediate_steps']
+        ],
+        "main_body": "Detailed insights are extracted from the selected paper and complementary web search results.",
+        "conclusion": "The research demonstrates the potential and breadth of current AI developments.",
+        "sources": ["ArXiv", "SerpAPI", "ChromaDB"]
+    })
+
+def build_runnable(llm=None, tool_map: dict = None, checkpointer=None):
+    '''
+    Builds and compiles the state graph. By default it uses the configured LLM and the real
+    tools; pass a different LLM or tool map (e.g. offline fakes) to run the same graph on them.
+    With a checkpointer, the state is saved after every node so failed runs can be resumed.
+    '''
+    nav = build_navigator(llm or get_llm())
+    tool_map = tool_map or tool_str_to_func
+
+    # Build the state graph
+    graph = StateGraph(AgentState)
+    graph.add_node('navigator', traced('node.navigator')(partial(run_navigator, navigator=nav)))
+    graph.add_node('tools', traced('node.tools')(partial(run_tools, tool_map=tool_map)))
+    graph.add_node('final_answer', traced('node.final_answer')(partial(run_final_answer, tool_map=tool_map)))
+
+    graph.set_entry_point('navigator')
+    graph.add_conditional_edges(
+        source='navigator',
+        path=router,
+        path_map={'tools': 'tools', 'final_answer': 'final_answer', END: END}
+    )
+    graph.add_edge('tools', 'navigator')
+    graph.add_edge('final_answer', END)
+    return graph.compile(checkpointer=checkpointer)
+
+@lru_cache(maxsize=1)
+def get_runnable():
+    '''The default compiled graph, built on first use and shared by every run in the process.'''
+    return build_runnable(checkpointer=checkpoints.checkpointer)
+
+def can_resume(thread_id: str, graph=None) -> bool:
+    '''True if the run has a saved checkpoint with nodes still to run, i.e. it failed or was interrupted.'''
+    graph = graph or get_runnable()
+    if not thread_id or graph.checkpointer is None:
+        return False
+    return bool(graph.get_state({'configurable': {'thread_id': thread_id}}).next)
+
+def _merge_update(state: dict, update: dict):
+    '''Applies a node update to a state dict the way the graph's reducers do.'''
+    for key, value in (update or {}).items():
+        if key == 'intermediate_steps':
+            state[key] = state.get(key, []) + value
+        else:
+            state[key] = value
+
+def make_initial_state(query: str, arxiv_id: str) -> dict:
+    '''The starting state of a run: the user's query, with the selected paper's abstract lookup queued first.'''
+    return {
+        'input': query,
+        'chat_history': [],
+        'intermediate_steps': [
+            (AgentAction(tool="fetch_arxiv", tool_input={"input": arxiv_id}, log="TBD"), "")
+        ]
+    }
+
+def steps_to_json(intermediate_steps: list) -> list:
+    return [
+        {'tool': action.tool, 'tool_input': action.tool_input, 'output': output}
+        for action, output in intermediate_steps
+    ]
+
+def steps_from_json(steps: list) -> list:
+    return [
+        (AgentAction(tool=s['tool'], tool_input=s['tool_input'], log="Cached"), s['output']) for s in steps
+    ]
+
+async def astream_run(initial_state: dict, graph=None, arxiv_id: str = None, thread_id: str = None):
+    '''
+    Runs the graph asynchronously and yields events as they happen:
+
+    - {'type': 'token', 'node', 'text'}: a streamed LLM token (or tool-call argument fragment)
+    - {'type': 'step', 'node', 'update', 'step_seconds', 'elapsed'}: a finished node
+    - {'type': 'done', 'state', 'elapsed', 'trace', 'cached', 'thread_id'}: the final merged state and the run's spans
+
+    With an `arxiv_id`, a finished run about a similar question on the same paper, made with
+    the same LLM and search providers, is returned from the answer cache instead (a single 'done' event with cached set), and new runs that
+    reach a final answer are stored there.
+
+    On a checkpointed graph the run is saved under `thread_id` (a new one if not given) after
+    every node. If it raises, call again with initial_state=None and the same thread_id to
+    resume from the last finished node; the tool outputs gathered so far are kept. Checkpoints
+    of finished runs are deleted.
+    '''
+    graph = graph or get_runnable()
+    thread_id = thread_id or uuid.uuid4().hex
+    config = {'configurable': {'thread_id': thread_id}}
+    done = None
+    with start_trace('navigator.resume' if initial_state is None else 'navigator.run') as trace:
+        start = time.perf_counter()
+        cached = None
+        if initial_state is not None and arxiv_id:
+            cached = answer_cache.lookup(arxiv_id, initial_state['input'], provider_key())
+        if cached:
+            state = dict(initial_state)
+            state['intermediate_steps'] = steps_from_json(cached['answer']['intermediate_steps'])
+            done = {'type': 'done', 'state': state, 'elapsed': time.perf_counter() - start, 'cached': cached}
+        else:
+            async for event in _astream_events(initial_state, graph, config):
+                if event['type'] == 'done':
+                    done = dict(event, cached=None)
+                else:
+                    yield event
+            steps = done['state'].get('intermediate_steps', [])
+            if arxiv_id and any(action.tool == 'final_answer' for action, _ in steps):
+                answer_cache.store(arxiv_id, done['state']['input'], {'intermediate_steps': steps_to_json(steps)},
+                                   provider_key())
+            if hasattr(graph.checkpointer, 'delete_thread'):
+                graph.checkpointer.delete_thread(thread_id)
+    # Sent after the trace is closed, so it includes the root span
+    done['trace'] = trace
+    done['thread_id'] = thread_id
+    yield done
+
+async def _astream_events(initial_state: dict, graph, config: dict):
+    if initial_state is None:
+        # Resuming: start from the checkpointed state; the graph continues with its next node
+        snapshot = await graph.aget_state(config)
+        if not snapshot.next:
+            raise ValueError(f"Run {config['configurable']['thread_id']} has nothing left to resume")
+        state = dict(snapshot.values)
+    else:
+        state = dict(initial_state)
+    start = last = time.perf_counter()
+    async for mode, chunk in graph.astream(initial_state, config, stream_mode=['updates', 'messages']):
+        if mode == 'messages':
+            message, metadata = chunk
+            text = message.content if isinstance(message.content, str) else ''
+            for tool_chunk in getattr(message, 'tool_call_chunks', None) or []:
+                text += tool_chunk.get('args') or ''
+            if text:
+                yield {'type': 'token', 'node': metadata.get('langgraph_node'), 'text': text}
+            continue
+        now = time.perf_counter()
+        for node, update in chunk.items():
+            _merge_update(state, update)
+            yield {
+                'type': 'step',
+                'node': node,
+                'update': update,
+                'step_seconds': now - last,
+                'elapsed': now - start
+            }
+        last = now
+    yield {'type': 'done', 'state': state, 'elapsed': time.perf_counter() - start}
@@ -1,7 +1,6 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_groq import ChatGroq
-from getpass import getpass
-import os
+from functools import lru_cache
+from navigator.providers import make_llm
 
 system_prompt = (
     '''You are the Navigator, the great AI decision-maker.
@@ -12,6 +11,9 @@ system_prompt = (
     query, do NOT use that same tool with the same query again. Also, do NOT use
     any tool more than twice.
 
+    When several lookups do not depend on each other, request all of those tool
+    calls at once; they are executed in parallel.
+
     You should aim to collect information from a diverse range of sources before
     providing the answer to the user. Once you have collected plenty of information
     (stored in the scratchpad), use the final_answer tool.
@@ -25,10 +27,12 @@ prompt = ChatPromptTemplate.from_messages([
     ('assistant', 'scratchpad: {scratchpad}'),
 ])
 
-llm = ChatGroq(
-    model='llama-3.3-70b-versatile',
-    groq_api_key=os.getenv('GROQ_API_KEY') or getpass('YourAPI key: '),
-    temperature=0
-)
+@lru_cache(maxsize=1)
+def get_llm():
+    '''
+    Builds the navigator LLM on first use, so importing this module needs no API key. The
+    provider (groq, scripted or cassette) is chosen with NAVIGATOR_LLM_PROVIDER.
+    '''
+    return make_llm()
 
 # Tools will be bound later in the decision pipeline.
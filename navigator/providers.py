@@ -0,0 +1,200 @@
+import json
+import os
+import time
+from typing import Any, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_groq import ChatGroq
+from navigator.scratchpad import step_header
+from utils.cassette import cassette_key, get_cassette
+from utils.config import get_api_key
+
+# Which LLM drives the navigator: the Groq API, a scripted stand-in, or recorded Groq responses
+LLM_PROVIDERS = ('groq', 'scripted', 'cassette')
+# Which backend serves web_search and fetch_arxiv: the real APIs, canned results, or recorded results
+SEARCH_PROVIDERS = ('live', 'fake', 'cassette')
+SEARCH_PROVIDER = os.getenv('SEARCH_PROVIDER', 'live')
+# replay: only recorded responses, misses raise; record: misses go to the real service and are saved
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'replay')
+LLM_CASSETTE_PATH = os.getenv('LLM_CASSETTE_PATH', './cassettes/llm.json')
+SEARCH_CASSETTE_PATH = os.getenv('SEARCH_CASSETTE_PATH', './cassettes/search.json')
+GROQ_MODEL = 'llama-3.3-70b-versatile'
+
+# Used by the scripted provider when NAVIGATOR_SCRIPT is not set; "{query}" is the user's query
+DEFAULT_SCRIPT = [
+    [('rag_search', {'query': '{query}'}), ('web_search', {'query': '{query}'})],
+    [('final_answer', {
+        'introduction': 'Scripted report for: {query}',
+        'research_steps': ['rag_search', 'web_search'],
+        'main_body': 'This report was produced by the scripted navigator, without an LLM.',
+        'conclusion': 'No conclusions are drawn from scripted runs.',
+        'sources': ['rag_search', 'web_search'],
+    })],
+]
+
+
+def _fill_query(value, query: str):
+    if isinstance(value, str):
+        return value.replace('{query}', query)
+    if isinstance(value, list):
+        return [_fill_query(v, query) for v in value]
+    if isinstance(value, dict):
+        return {k: _fill_query(v, query) for k, v in value.items()}
+    return value
+
+
+def _usage(messages, output_tokens: int) -> dict:
+    input_tokens = sum(len(str(m.content)) // 4 for m in messages)
+    return {'input_tokens': input_tokens, 'output_tokens': output_tokens, 'total_tokens': input_tokens + output_tokens}
+
+
+class ScriptedToolCallingModel(BaseChatModel):
+    '''
+    Chat model that plays a fixed script of tool calls, for offline runs and load tests.
+
+    `script` is a list of turns, each a list of (tool name, arguments); "{query}" in an
+    argument is replaced by the user's query. Every call returns the first turn whose calls
+    are not all in the scratchpad yet (the last turn once all are), so the model keeps no
+    state between calls: concurrent and resumed runs each follow the script on their own.
+    '''
+    script: list
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return 'scripted'
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        query = next((str(m.content) for m in reversed(messages) if m.type == 'human'), '')
+        scratchpad = '\n'.join(str(m.content) for m in messages if m.type == 'ai')
+        turns = [[(name, _fill_query(args, query)) for name, args in turn] for turn in self.script]
+        calls = next(
+            (turn for turn in turns if not all(step_header(name, args) in scratchpad for name, args in turn)),
+            turns[-1]
+        )
+        message = AIMessage(
+            content='',
+            tool_calls=[{'name': name, 'args': args, 'id': f'call_{i}'} for i, (name, args) in enumerate(calls)],
+            usage_metadata=_usage(messages, 20 * len(calls))
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class CassetteChatModel(BaseChatModel):
+    '''
+    Chat model that replays recorded responses of another model from a cassette file.
+
+    Requests are keyed by the prompt messages and the names of the bound tools. With `inner`
+    set (record mode), requests that were never recorded are sent to it and saved; without
+    it, they raise CassetteMiss.
+    '''
+    path: str
+    inner: Optional[Any] = None
+    tool_names: list = []
+
+    @property
+    def _llm_type(self) -> str:
+        return 'cassette'
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(t, 'name', str(t)) for t in tools]
+        inner = self.inner.bind_tools(tools, **kwargs) if self.inner is not None else None
+        return self.__class__(path=self.path, inner=inner, tool_names=names)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = cassette_key(self.tool_names, [(m.type, m.content) for m in messages])
+
+        def record() -> dict:
+            out = self.inner.invoke(messages)
+            return {
+                'content': out.content,
+                'tool_calls': [{'name': c['name'], 'args': c['args'], 'id': c.get('id')} for c in out.tool_calls or []],
+                'usage_metadata': out.usage_metadata,
+            }
+
+        recorded = get_cassette(self.path).get_or_record(key, record, record=self.inner is not None)
+        message = AIMessage(
+            content=recorded['content'],
+            tool_calls=recorded['tool_calls'],
+            usage_metadata=recorded['usage_metadata'] or _usage(messages, 0)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def make_groq_llm() -> ChatGroq:
+    return ChatGroq(
+        model=GROQ_MODEL,
+        groq_api_key=get_api_key('GROQ_API_KEY', 'Groq API key: '),
+        temperature=0
+    )
+
+
+def load_script(path: str = None) -> list:
+    '''Reads a scripted-provider script (a JSON list of turns of [tool, arguments]), or returns the default one.'''
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path, encoding='utf-8') as f:
+        return [[tuple(call) for call in turn] for turn in json.load(f)]
+
+
+def make_llm(provider: str = None):
+    '''Builds the navigator LLM of a provider (default: NAVIGATOR_LLM_PROVIDER, else groq).'''
+    provider = provider or os.getenv('NAVIGATOR_LLM_PROVIDER', 'groq')
+    if provider == 'groq':
+        return make_groq_llm()
+    if provider == 'scripted':
+        return ScriptedToolCallingModel(
+            script=load_script(os.getenv('NAVIGATOR_SCRIPT')),
+            latency=float(os.getenv('SCRIPTED_LLM_LATENCY', '0'))
+        )
+    if provider == 'cassette':
+        return CassetteChatModel(path=LLM_CASSETTE_PATH, inner=make_groq_llm() if CASSETTE_MODE == 'record' else None)
+    raise ValueError(f"Unknown LLM provider {provider!r}, expected one of {', '.join(LLM_PROVIDERS)}")
+
+
+def provider_key(provider: str = None) -> str:
+    '''
+    Names the LLM (provider and model or script) and the search provider that produce a run's
+    results, e.g. "groq:llama-3.3-70b-versatile|search=live"; stored results are only reused
+    under the same key.
+    '''
+    provider = provider or os.getenv('NAVIGATOR_LLM_PROVIDER', 'groq')
+    model = (os.getenv('NAVIGATOR_SCRIPT') or 'default') if provider == 'scripted' else GROQ_MODEL
+    return f"{provider}:{model}|search={SEARCH_PROVIDER}"
+
+
+def fake_web_search(query: str) -> str:
+    '''Canned web results for a query, in the format of the real web_search.'''
+    return '\n---\n'.join(
+        f"Result {i} for {query}\nSnippet about {query}.\nhttps://example.org/{i}" for i in range(5)
+    )
+
+
+def fake_fetch_arxiv(arxiv_id: str) -> str:
+    '''A canned abstract, in the format of the real fetch_arxiv.'''
+    return f"Title: Paper {arxiv_id}\nAbstract: A synthetic abstract for {arxiv_id}."
+
+
+def search_backend(tool: str, live, fake, provider: str = None):
+    '''
+    Returns the function that serves a search tool: `live` (the real API), `fake`, or `live`
+    behind the search cassette, depending on the provider (default: SEARCH_PROVIDER).
+    '''
+    provider = provider or SEARCH_PROVIDER
+    if provider == 'live':
+        return live
+    if provider == 'fake':
+        return fake
+    if provider == 'cassette':
+        def replay(argument: str) -> str:
+            return get_cassette(SEARCH_CASSETTE_PATH).get_or_record(
+                cassette_key(tool, argument), lambda: live(argument), record=CASSETTE_MODE == 'record'
+            )
+        return replay
+    raise ValueError(f"Unknown search provider {provider!r}, expected one of {', '.join(SEARCH_PROVIDERS)}")
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import List
+from langchain_core.agents import AgentAction
+
+
+def estimate_tokens(text: str) -> int:
+    '''Cheap token estimate (~4 characters per token) used for budgeting the prompt.'''
+    return len(text) // 4 + 1
+
+
+def step_key(action: AgentAction) -> str:
+    '''Identifies a tool call by tool name and arguments, so repeated calls collapse to one entry.'''
+    return f"{action.tool}:{json.dumps(action.tool_input, sort_keys=True, default=str)}"
+
+
+def step_header(tool: str, tool_input) -> str:
+    '''First line of a step in the rendered scratchpad.'''
+    return f"Tool: {tool}, Input: {tool_input}"
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [truncated {len(text) - limit} chars]"
+
+
+class Scratchpad:
+    '''
+    Renders intermediate steps into the navigator's scratchpad under a token budget.
+
+    Repeated tool calls are deduplicated (the latest output wins), the most recent
+    `keep_recent` steps are shown at up to `max_recent_chars`, older ones are cut to
+    `max_old_chars`, and the oldest steps are dropped once the budget is exceeded.
+    Rendered entries are cached, so each turn only formats the steps that are new; the
+    cache is locked, so one renderer can be shared by concurrent runs.
+    '''
+    def __init__(self, token_budget: int = 3000, keep_recent: int = 4, max_recent_chars: int = 4000,
+                 max_old_chars: int = 400, cache_size: int = 2048):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.max_recent_chars = max_recent_chars
+        self.max_old_chars = max_old_chars
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render_step(self, key: str, action: AgentAction, output: str, recent: bool) -> tuple:
+        cache_key = (key, hashlib.sha1(output.encode('utf-8')).hexdigest(), recent)
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None:
+                self._cache.move_to_end(cache_key)
+                return entry
+        limit = self.max_recent_chars if recent else self.max_old_chars
+        text = f"{step_header(action.tool, action.tool_input)}\nOutput: {_truncate(output, limit)}"
+        entry = (text, estimate_tokens(text))
+        with self._lock:
+            self._cache[cache_key] = entry
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def render(self, intermediate_steps: List[tuple[AgentAction, str]]) -> str:
+        # Deduplicate by (tool, input), keeping the latest output at its latest position
+        latest = OrderedDict()
+        for action, log_output in intermediate_steps:
+            if log_output == 'TBD':
+                continue
+            key = step_key(action)
+            latest.pop(key, None)
+            latest[key] = (action, str(log_output))
+
+        steps = list(latest.items())
+        first_recent = max(len(steps) - self.keep_recent, 0)
+        entries = [
+            self._render_step(key, action, output, recent=i >= first_recent)
+            for i, (key, (action, output)) in enumerate(steps)
+        ]
+
+        # Drop the oldest entries until the rendered scratchpad fits the budget
+        total = sum(tokens for _, tokens in entries)
+        dropped = 0
+        while total > self.token_budget and dropped < first_recent:
+            total -= entries[dropped][1]
+            dropped += 1
+
+        rendered = [text for text, _ in entries[dropped:]]
+        if dropped:
+            rendered.insert(0, f"[{dropped} earlier research steps omitted]")
+        return '\n---\n'.join(rendered)
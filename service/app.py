@@ -0,0 +1,161 @@
+import asyncio
+import os
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
+from navigator.decision_pipeline import astream_run, can_resume, make_initial_state, report_from_state, steps_to_json
+from service.jobs import JobQueue, QueueFull
+from utils.chromadb_handler import chroma_db
+from utils.ingest_queue import BulkIngestJob
+from utils.model_registry import warm_up, load_metrics
+
+# Jobs beyond MAX_WORKERS running + MAX_PENDING waiting are rejected with 429
+job_queue = JobQueue(
+    max_workers=int(os.getenv('SERVICE_MAX_WORKERS', '4')),
+    max_pending=int(os.getenv('SERVICE_MAX_PENDING', '32'))
+)
+# Step outputs in job events are cut to this size; the full steps are in the job result
+EVENT_OUTPUT_CHARS = 1000
+
+
+class ReportRequest(BaseModel):
+    query: str
+    arxiv_id: str = ''
+
+
+class IngestRequest(BaseModel):
+    # Either explicit papers ({'id', 'pdf_url'}) or a query whose top papers are ingested
+    papers: Optional[List[dict]] = None
+    query: Optional[str] = None
+    top_k: int = 10
+
+
+def _describe_update(node: str, update: dict) -> list:
+    if node == 'navigator':
+        return [{'tool': a.tool, 'tool_input': a.tool_input} for a in update.get('pending_calls') or []]
+    return [
+        {**step, 'output': step['output'][:EVENT_OUTPUT_CHARS]}
+        for step in steps_to_json(update.get('intermediate_steps', []))
+    ]
+
+
+def run_report(job, query: str, arxiv_id: str, thread_id: str, resume: bool = False) -> dict:
+    '''
+    Runs the navigator for one query, recording each finished node as a job event. With resume,
+    continues the checkpointed run `thread_id` from its last finished node instead.
+    '''
+    initial_state = None if resume else make_initial_state(query, arxiv_id)
+
+    async def consume() -> dict:
+        async for event in astream_run(initial_state, arxiv_id=arxiv_id or None, thread_id=thread_id):
+            if event['type'] == 'step':
+                job.emit({
+                    'type': 'step',
+                    'node': event['node'],
+                    'calls': _describe_update(event['node'], event['update']),
+                    'step_seconds': event['step_seconds'],
+                    'elapsed': event['elapsed'],
+                })
+            elif event['type'] == 'done':
+                return event
+
+    done = asyncio.run(consume())
+    cached = done['cached']
+    return {
+        'report': report_from_state(done['state']),
+        'steps': steps_to_json(done['state']['intermediate_steps']),
+        'elapsed': done['elapsed'],
+        'cached': {'query': cached['query'], 'similarity': cached['similarity']} if cached else None,
+        'timing': done['trace'].breakdown(),
+        'thread_id': done['thread_id'],
+    }
+
+
+def run_ingest(job, papers: list = None, query: str = None, top_k: int = 10) -> dict:
+    '''Downloads and stores papers (given, or the top matches of a query), reporting per-paper progress.'''
+    if not papers:
+        papers = chroma_db.retrieve_relevant_papers(query_text=query, top_k=top_k)
+    ingest = BulkIngestJob(
+        papers,
+        on_progress=lambda paper_id, status, detail: job.emit(
+            {'type': 'paper', 'paper_id': paper_id, 'status': status, 'detail': detail}
+        )
+    )
+    return ingest.start().wait()
+
+
+def _submit(kind: str, fn, params: dict) -> dict:
+    try:
+        return job_queue.submit(kind, fn, params).to_dict(include_result=False)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': '5'})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.getenv('WARM_UP_MODELS', '1') == '1':
+        threading.Thread(target=warm_up, daemon=True).start()
+    # Indexed before requests are served, so no search request indexes the catalog inline
+    if os.getenv('SYNC_CATALOG_AT_START', '1') == '1':
+        await asyncio.to_thread(chroma_db.sync_catalog)
+    yield
+    job_queue.shutdown()
+
+
+app = FastAPI(title='AI Research Assistant', lifespan=lifespan)
+
+
+@app.get('/health')
+def health() -> dict:
+    return {'status': 'ok', 'jobs': job_queue.stats(), 'models': load_metrics()}
+
+
+@app.get('/papers/search')
+def search_papers(query: str, top_k: int = Query(5, ge=1, le=100)) -> list:
+    '''Returns the catalog papers most relevant to a query (a quick read, served inline).'''
+    return chroma_db.retrieve_relevant_papers(query_text=query, top_k=top_k)
+
+
+@app.post('/jobs/report', status_code=202)
+def submit_report(request: ReportRequest) -> dict:
+    return _submit('report', run_report, {
+        'query': request.query, 'arxiv_id': request.arxiv_id, 'thread_id': uuid.uuid4().hex
+    })
+
+
+@app.post('/jobs/{job_id}/resume', status_code=202)
+def resume_report(job_id: str) -> dict:
+    '''Starts a new job that continues a failed report job from its last finished step.'''
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Unknown job')
+    if job.kind != 'report' or job.status != 'failed' or not can_resume(job.params['thread_id']):
+        raise HTTPException(status_code=409, detail='Only failed report jobs with a saved checkpoint can be resumed')
+    return _submit('report', run_report, dict(job.params, resume=True))
+
+
+@app.post('/jobs/ingest', status_code=202)
+def submit_ingest(request: IngestRequest) -> dict:
+    if not request.papers and not request.query:
+        raise HTTPException(status_code=422, detail='Provide papers or a query')
+    return _submit('ingest', run_ingest, {'papers': request.papers, 'query': request.query, 'top_k': request.top_k})
+
+
+@app.get('/jobs/{job_id}')
+def get_job(job_id: str) -> dict:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Unknown job')
+    return job.to_dict()
+
+
+@app.get('/jobs/{job_id}/events')
+def get_job_events(job_id: str, after: int = Query(0, ge=0)) -> list:
+    '''Returns the job's progress events after the first `after` ones.'''
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Unknown job')
+    return job.events(after)
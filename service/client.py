@@ -0,0 +1,49 @@
+import time
+from utils.http_client import get_session
+
+
+class ResearchClient:
+    '''Small HTTP client for the research service (service/app.py).'''
+    def __init__(self, base_url: str, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, **kwargs):
+        res = get_session().request(method, f'{self.base_url}{path}', timeout=self.timeout, **kwargs)
+        res.raise_for_status()
+        return res.json()
+
+    def health(self) -> dict:
+        return self._request('GET', '/health')
+
+    def search_papers(self, query: str, top_k: int = 5) -> list:
+        return self._request('GET', '/papers/search', params={'query': query, 'top_k': top_k})
+
+    def start_report(self, query: str, arxiv_id: str = '') -> dict:
+        return self._request('POST', '/jobs/report', json={'query': query, 'arxiv_id': arxiv_id})
+
+    def resume_report(self, job_id: str) -> dict:
+        '''Starts a job that continues a failed report job; returns the new job.'''
+        return self._request('POST', f'/jobs/{job_id}/resume')
+
+    def start_ingest(self, papers: list = None, query: str = None, top_k: int = 10) -> dict:
+        return self._request('POST', '/jobs/ingest', json={'papers': papers, 'query': query, 'top_k': top_k})
+
+    def job(self, job_id: str) -> dict:
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def events(self, job_id: str, after: int = 0) -> list:
+        return self._request('GET', f'/jobs/{job_id}/events', params={'after': after})
+
+    def wait(self, job_id: str, on_event=None, poll_interval: float = 0.5) -> dict:
+        '''Polls a job until it finishes, passing each new progress event to on_event; returns the job.'''
+        seen = 0
+        while True:
+            job = self.job(job_id)
+            for event in self.events(job_id, after=seen):
+                seen += 1
+                if on_event:
+                    on_event(event)
+            if job['status'] in ('done', 'failed'):
+                return job
+            time.sleep(poll_interval)
@@ -0,0 +1,119 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    '''Raised when a job is submitted while the queue is at capacity.'''
+
+
+class Job:
+    '''A unit of work run by the JobQueue, with its status, result and progress events.'''
+    def __init__(self, kind: str, params: dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._events = []
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict):
+        '''Records a progress event; clients poll them with events(after=n).'''
+        with self._lock:
+            self._events.append(event)
+
+    def events(self, after: int = 0) -> list:
+        with self._lock:
+            return self._events[after:]
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'events': len(self._events),
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobQueue:
+    '''
+    Bounded job queue served by a fixed pool of worker threads.
+
+    At most `max_workers` jobs run at once and at most `max_pending` wait; submitting beyond
+    that raises QueueFull, so callers get backpressure instead of an unbounded backlog. Workers
+    are threads of one process, so they share the retriever, embedding model and compiled graph.
+    Only the most recent `keep_finished` finished jobs are kept for polling.
+    '''
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, keep_finished: int = 1000):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, params: dict) -> Job:
+        '''Queues fn(job, **params) and returns the Job right away.'''
+        job = Job(kind, params)
+        with self._lock:
+            if self._queued >= self.max_pending:
+                raise QueueFull(f"{self._queued} jobs are already waiting")
+            self._queued += 1
+            self._jobs[job.id] = job
+            self._trim()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Job, fn):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, **job.params)
+            job.status = 'done'
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._running -= 1
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
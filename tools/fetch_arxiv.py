@@ -1,19 +1,36 @@
 from langchain_core.tools import tool
 import requests
-import re
+from navigator.providers import SEARCH_PROVIDER, fake_fetch_arxiv, search_backend
+from utils.arxiv_client import fetch_metadata, normalize_arxiv_id
+from utils.retry import call_with_retry
+from utils.tool_cache import tool_cache
 
-abstract_pattern = re.compile(
-    r'<blockquote class="abstract mathjax">\s*<span class="descriptor">Abstract:</span>\s*(.*?)\s*</blockquote>',
-    re.DOTALL
-)
+class AbstractNotFound(LookupError):
+    '''The export API has no entry for an ID (unknown, or not indexed yet); raised so the miss is not cached.'''
+
+def _fetch_abstract(arxiv_id: str) -> str:
+    entry = fetch_metadata([arxiv_id]).get(arxiv_id)
+    if not entry:
+        raise AbstractNotFound(arxiv_id)
+    return (
+        f"Title: {entry['title']}\n"
+        f"Authors: {', '.join(entry['authors'])}\n"
+        f"Published: {entry['published'][:10]}\n"
+        f"PDF: {entry['pdf_url']}\n"
+        f"Abstract: {entry['abstract']}"
+    )
+
+# The arXiv export API, or an offline stand-in (SEARCH_PROVIDER=fake|cassette)
+_backend = search_backend('fetch_arxiv', lambda arxiv_id: call_with_retry(_fetch_abstract, arxiv_id), fake_fetch_arxiv)
 
 @tool('fetch_arxiv')
 def fetch_arxiv(arxiv_id: str) -> str:
     '''Fetches the abstract from an ArXiv paper given its ArXiv ID.'''
+    # fetch_metadata keys its result by the normalized id (2108.11510 for an abs URL), and so does the cache
+    arxiv_id = normalize_arxiv_id(arxiv_id)
     try:
-        res = requests.get(f'https://arxiv.org/abs/{arxiv_id}', timeout=10)
-        res.raise_for_status()
-        match = abstract_pattern.search(res.text)
-        return match.group(1) if match else "Abstract not available."
+        return tool_cache.get_or_call('fetch_arxiv', {'arxiv_id': arxiv_id, 'provider': SEARCH_PROVIDER}, lambda: _backend(arxiv_id))
+    except AbstractNotFound:
+        return "Abstract not available."
     except requests.exceptions.RequestException as e:
         return f"Error fetching abstract: {str(e)}"
@@ -1,12 +1,13 @@
 from langchain_core.tools import tool
+from typing import Union
 
 @tool('final_answer')
 def final_answer(
     introduction: str,
-    research_steps: str or list,
+    research_steps: Union[str, list],
     main_body: str,
     conclusion: str,
-    sources: str or list
+    sources: Union[str, list]
 ) -> str:
     '''Returns a formatted research report string.'''
     if isinstance(research_steps, list):
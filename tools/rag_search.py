@@ -1,39 +1,30 @@
 from langchain_core.tools import tool
-from utils.chromadb_handler import chroma_db, embedding_function
+from utils.chromadb_handler import chroma_db
+from utils.context_packer import pack_contexts
 
-def format_rag_contexts(query_result: dict) -> str:
+# Packed rag results stay under this size, so they fit the scratchpad's per-step limit
+RAG_CONTEXT_TOKENS = 900
+
+def format_rag_contexts(query_result: dict, token_budget: int = RAG_CONTEXT_TOKENS, paper_catalog=None) -> str:
     """
-    Formats the ChromaDB query results into a readable string format.
+    Formats hybrid search results as whole passages grouped by paper, within a token budget.
 
     Args:
-        query_result (dict): Dictionary containing 'ids', 'metadatas', and 'documents' from ChromaDB query.
+        query_result (dict): Flat lists of 'ids', 'metadatas', 'documents' and 'scores' from a hybrid search.
+        token_budget (int): Approximate size limit of the returned text.
+        paper_catalog (PaperCatalog): Catalog for titles and authors (default: the knowledge base's).
     
     Returns:
-        str: A formatted string of document titles, chunk excerpts, and paper IDs.
+        str: Paper titles and metadata with their most relevant passages, best first.
     """
-    ids = query_result.get("ids", [])
-    metadatas = query_result.get("metadatas", [])
-    documents = query_result.get("documents", [])
-    
-    if not ids or len(ids) == 0:
-        return "No relevant documents found."
-    
-    formatted_results = []
-    for i in range(len(ids)):
-        text = (
-            f"Title: {metadatas[i].get('title', 'Unknown')}\n"
-            f"Chunk: {documents[i][:200]}...\n"
-            f"ArXiv ID: {metadatas[i].get('paper_id', 'N/A')}\n"
-        )
-        formatted_results.append(text)
-    
-    return "\n---\n".join(formatted_results)
+    return pack_contexts(query_result, token_budget=token_budget, paper_catalog=paper_catalog or chroma_db.catalog)
 
 @tool('rag_search_filter')
 def rag_search_filter(query: str, arxiv_id: str) -> str:
     """
-    Retrieves relevant research chunks from the ChromaDB chunks_collection for the given query,
-    filtering by a specific ArXiv ID.
+    Retrieves relevant research chunks for the given query, filtering by a specific ArXiv ID.
+    Combines vector similarity with exact keyword (BM25) matches, and includes the text
+    around the best matches.
     
     Args:
         query (str): The natural language search query.
@@ -42,18 +33,14 @@ def rag_search_filter(query: str, arxiv_id: str) -> str:
     Returns:
         str: Formatted string of matching document chunks.
     """
-    xq = embedding_function([query])[0]
-    results = chroma_db.chunks_collection.query(
-        query_embeddings=[xq],
-        n_results=6,
-        where={"paper_id": arxiv_id}
-    )
-    return format_rag_contexts(results)
+    results = chroma_db.hybrid_search(query, top_k=6, paper_id=arxiv_id)
+    return format_rag_contexts(chroma_db.expand_context(results))
 
 @tool('rag_search')
 def rag_search(query: str) -> str:
     """
-    Retrieves relevant research chunks from the ChromaDB chunks_collection based on the query.
+    Retrieves relevant research chunks based on the query, combining vector similarity with
+    exact keyword (BM25) matches such as method or dataset names.
     
     Args:
         query (str): The natural language search query.
@@ -61,9 +48,5 @@ def rag_search(query: str) -> str:
     Returns:
         str: Formatted string of matching document chunks.
     """
-    xq = embedding_function([query])[0]
-    results = chroma_db.chunks_collection.query(
-        query_embeddings=[xq],
-        n_results=5
-    )
+    results = chroma_db.hybrid_search(query, top_k=8)
     return format_rag_contexts(results)
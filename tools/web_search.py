@@ -1,18 +1,35 @@
 from langchain_core.tools import tool
-from serpapi import GoogleSearch
+import os
 from utils.config import serpapi_params
+from navigator.providers import SEARCH_PROVIDER, fake_web_search, search_backend
+from utils.http_client import get_session
+from utils.retry import call_with_retry
+from utils.tool_cache import tool_cache
+
+# Overridable so the tool can be pointed at a local stand-in server
+SERPAPI_BASE_URL = os.getenv('SERPAPI_BASE_URL', 'https://serpapi.com')
+
+def _search(query: str) -> str:
+    res = get_session().get(
+        f'{SERPAPI_BASE_URL}/search.json',
+        params={**serpapi_params(), 'q': query, 'num': 5},
+        timeout=20
+    )
+    res.raise_for_status()
+    results = res.json().get('organic_results', [])
+    if not results:
+        return "No results found."
+    return '\n---\n'.join(
+        [f"{x['title']}\n{x['snippet']}\n{x['link']}" for x in results]
+    )
+
+# SerpAPI, or an offline stand-in (SEARCH_PROVIDER=fake|cassette)
+_backend = search_backend('web_search', lambda query: call_with_retry(_search, query), fake_web_search)
 
 @tool('web_search')
 def web_search(query: str) -> str:
     '''Finds general knowledge information using a Google search.'''
     try:
-        search = GoogleSearch({**serpapi_params, 'q': query, 'num': 5})
-        results = search.get_dict().get('organic_results', [])
-        if not results:
-            return "No results found."
-        formatted_results = '\n---\n'.join(
-            [f"{x['title']}\n{x['snippet']}\n{x['link']}" for x in results]
-        )
-        return formatted_results
+        return tool_cache.get_or_call('web_search', {'query': query, 'provider': SEARCH_PROVIDER}, lambda: _backend(query))
     except Exception as e:
         return f"Error during web search: {str(e)}"
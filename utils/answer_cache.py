@@ -0,0 +1,128 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from utils.arxiv_client import strip_version
+from utils.model_registry import DEFAULT_MODEL_ID, get_embedding_function
+from utils.tracing import span
+
+
+class SemanticAnswerCache:
+    '''
+    Cache of finished navigator runs, keyed by (ArXiv ID, providers, query embedding). The ID
+    is used without its version, so 2108.11510 and 2108.11510v1 share their entries; the
+    providers key (see navigator.providers.provider_key) keeps scripted or replayed runs apart
+    from live ones.
+
+    A request is served from the cache when a stored query about the same paper has a cosine
+    similarity of at least `threshold` with it. Entries expire after `ttl` seconds, the least
+    recently used ones are evicted beyond `max_items`, and all entries of a paper are dropped
+    when its chunks are re-ingested (see invalidate).
+    '''
+    def __init__(self, db_path: str = './answer_cache/answers.sqlite', threshold: float = 0.92,
+                 ttl: float = 7 * 24 * 3600, max_items: int = 5000, model_id: str = DEFAULT_MODEL_ID):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_items = max_items
+        self.model_id = model_id
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY, arxiv_id TEXT NOT NULL, '
+            'model_id TEXT NOT NULL, query TEXT NOT NULL, embedding BLOB NOT NULL, answer TEXT NOT NULL, '
+            'expires_at REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(answers)')]
+        if 'providers' not in columns:
+            # Entries stored before the providers were part of the key match no run
+            self._conn.execute("ALTER TABLE answers ADD COLUMN providers TEXT NOT NULL DEFAULT ''")
+        self._conn.execute('CREATE INDEX IF NOT EXISTS answers_paper ON answers (arxiv_id, model_id)')
+        # Entries stored before IDs were keyed without their version
+        for (stored_id,) in self._conn.execute('SELECT DISTINCT arxiv_id FROM answers').fetchall():
+            if strip_version(stored_id) != stored_id:
+                self._conn.execute('UPDATE answers SET arxiv_id = ? WHERE arxiv_id = ?', (strip_version(stored_id), stored_id))
+        self._conn.commit()
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(get_embedding_function(self.model_id)([query])[0], dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-12)
+
+    def lookup(self, arxiv_id: str, query: str, providers: str) -> dict:
+        '''
+        Returns the best stored answer for a similar query about the same paper that was
+        produced by the same providers, or None.
+
+        Returns:
+            dict: 'answer' (as stored), 'query' (the stored query) and 'similarity'.
+        '''
+        with span('answer_cache.lookup') as current:
+            arxiv_id = strip_version(arxiv_id)
+            vector = self._embed(query)
+            now = time.time()
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT id, query, embedding, answer FROM answers '
+                    'WHERE arxiv_id = ? AND model_id = ? AND providers = ? AND expires_at > ?',
+                    (arxiv_id, self.model_id, providers, now)
+                ).fetchall()
+                best, best_score = None, -1.0
+                if rows:
+                    scores = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows]) @ vector
+                    index = int(np.argmax(scores))
+                    best, best_score = rows[index], float(scores[index])
+                if best is None or best_score < self.threshold:
+                    self.misses += 1
+                    current.set(hit=False, candidates=len(rows))
+                    return None
+                self.hits += 1
+                self._conn.execute('UPDATE answers SET last_access = ? WHERE id = ?', (now, best[0]))
+                self._conn.commit()
+            current.set(hit=True, candidates=len(rows), similarity=best_score)
+            return {'answer': json.loads(best[3]), 'query': best[1], 'similarity': best_score}
+
+    def store(self, arxiv_id: str, query: str, answer: dict, providers: str):
+        '''Stores a JSON-serializable answer for (paper, providers, query) and evicts expired and excess entries.'''
+        arxiv_id = strip_version(arxiv_id)
+        vector = self._embed(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO answers (arxiv_id, model_id, providers, query, embedding, answer, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (arxiv_id, self.model_id, providers, query, vector.tobytes(), json.dumps(answer, default=str),
+                 now + self.ttl, now)
+            )
+            self._conn.execute('DELETE FROM answers WHERE expires_at <= ?', (now,))
+            self._conn.execute(
+                'DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)',
+                (self.max_items,)
+            )
+            self._conn.commit()
+
+    def invalidate(self, arxiv_id: str) -> int:
+        '''Drops every cached answer about a paper; returns how many were removed.'''
+        with self._lock:
+            removed = self._conn.execute(
+                'DELETE FROM answers WHERE arxiv_id = ?', (strip_version(arxiv_id),)
+            ).rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = self._conn.execute('SELECT COUNT(*) FROM answers').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'items': items}
+
+
+# Shared cache of finished reports; similar questions about the same paper reuse the stored run
+answer_cache = SemanticAnswerCache(
+    db_path=os.getenv('ANSWER_CACHE_PATH', './answer_cache/answers.sqlite'),
+    threshold=float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.92'))
+)
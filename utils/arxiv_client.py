@@ -0,0 +1,132 @@
+import argparse
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+import pandas as pd
+from utils.http_client import get_session
+
+# Overridable so the client can be pointed at a local stand-in server
+ARXIV_API_URL = os.getenv('ARXIV_API_URL', 'https://export.arxiv.org/api/query')
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+# The export API accepts up to this many ids per request; arXiv asks for ~3s between requests
+MAX_IDS_PER_REQUEST = 100
+REQUEST_DELAY_SECONDS = 3.0
+
+
+def normalize_arxiv_id(entry_id: str) -> str:
+    '''Returns the bare ArXiv ID from an ID or an abs/pdf URL, e.g. http://arxiv.org/abs/2108.11510v1.'''
+    entry_id = str(entry_id).strip().rstrip('/')
+    for marker in ('/abs/', '/pdf/'):
+        if marker in entry_id:
+            entry_id = entry_id.split(marker, 1)[1]
+    return entry_id[:-4] if entry_id.endswith('.pdf') else entry_id
+
+
+def strip_version(arxiv_id: str) -> str:
+    '''Returns the normalized ArXiv ID without its version suffix, e.g. 2108.11510 for 2108.11510v1.'''
+    return re.sub(r'v\d+$', '', normalize_arxiv_id(arxiv_id))
+
+
+def _parse_entry(entry) -> dict:
+    pdf_url = ''
+    for link in entry.findall(f'{ATOM}link'):
+        if link.get('title') == 'pdf':
+            pdf_url = link.get('href', '')
+    return {
+        'arxiv_id': normalize_arxiv_id(entry.findtext(f'{ATOM}id', '')),
+        'title': ' '.join(entry.findtext(f'{ATOM}title', '').split()),
+        'abstract': ' '.join(entry.findtext(f'{ATOM}summary', '').split()),
+        'authors': [a.findtext(f'{ATOM}name', '') for a in entry.findall(f'{ATOM}author')],
+        'published': entry.findtext(f'{ATOM}published', ''),
+        'updated': entry.findtext(f'{ATOM}updated', ''),
+        'pdf_url': pdf_url,
+    }
+
+
+def _iter_entries(arxiv_ids: list):
+    '''Requests one batch of ids and yields parsed entries while the Atom feed is still streaming in.'''
+    with get_session().get(
+        ARXIV_API_URL,
+        params={'id_list': ','.join(arxiv_ids), 'max_results': len(arxiv_ids)},
+        timeout=30,
+        stream=True
+    ) as res:
+        res.raise_for_status()
+        res.raw.decode_content = True
+        for _, elem in ET.iterparse(res.raw, events=('end',)):
+            if elem.tag == f'{ATOM}entry':
+                entry = _parse_entry(elem)
+                elem.clear()
+                # Unknown ids come back as an entry pointing at the API's error page
+                if entry['arxiv_id'] and 'api/errors' not in entry['arxiv_id']:
+                    yield entry
+
+
+def fetch_metadata(arxiv_ids: list, batch_size: int = MAX_IDS_PER_REQUEST, delay: float = REQUEST_DELAY_SECONDS) -> dict:
+    '''
+    Fetches metadata for many ArXiv IDs through the Atom export API, one request per batch.
+
+    Returns:
+        dict: {requested id: {'arxiv_id', 'title', 'abstract', 'authors', 'published', 'updated', 'pdf_url'}}.
+              IDs that arXiv does not know are left out.
+    '''
+    requested = list(dict.fromkeys(normalize_arxiv_id(i) for i in arxiv_ids))
+    metadata = {}
+    for start in range(0, len(requested), batch_size):
+        if start and delay:
+            time.sleep(delay)
+        batch = requested[start:start + batch_size]
+        for entry in _iter_entries(batch):
+            # A versionless request comes back with the latest version's id
+            fetched = entry['arxiv_id']
+            for arxiv_id in batch:
+                if fetched == arxiv_id or fetched.startswith(f'{arxiv_id}v'):
+                    metadata[arxiv_id] = entry
+    return metadata
+
+
+def enrich_catalog(csv_path: str = 'final_data.csv', out_path: str = None, overwrite: bool = False) -> int:
+    '''
+    Fills in summary, authors, published_year and pdf_url of catalog rows from the export API.
+    Only empty fields are filled unless overwrite is set. Returns the number of rows updated.
+    '''
+    # Text columns stay text even when they are all empty, and years stay integers (pandas would
+    # otherwise turn the column into floats and write "2023.0" as soon as one year is missing)
+    df = pd.read_csv(csv_path, dtype={'summary': object, 'authors': object, 'pdf_url': object})
+    df['published_year'] = pd.to_numeric(df['published_year'], errors='coerce').astype('Int64')
+    ids = [normalize_arxiv_id(e) for e in df['entry_id']]
+    metadata = fetch_metadata(ids)
+
+    updated = 0
+    for row, arxiv_id in enumerate(ids):
+        entry = metadata.get(arxiv_id)
+        if not entry:
+            continue
+        values = {
+            'summary': entry['abstract'],
+            'authors': ', '.join(entry['authors']),
+            'published_year': int(entry['published'][:4]) if entry['published'] else None,
+            'pdf_url': entry['pdf_url'],
+        }
+        changed = False
+        for column in values:
+            if values[column] and (overwrite or pd.isna(df.at[row, column]) or df.at[row, column] == ''):
+                df.at[row, column] = values[column]
+                changed = True
+        updated += changed
+
+    df.to_csv(out_path or csv_path, index=False)
+    print(f"✅ Enriched {updated} of {len(df)} catalog rows from the arXiv export API.")
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Enrich the paper catalog with arXiv metadata.')
+    parser.add_argument('--csv', default='final_data.csv')
+    parser.add_argument('--out', default=None)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+    enrich_catalog(args.csv, args.out, args.overwrite)
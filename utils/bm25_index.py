@@ -0,0 +1,101 @@
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were with we our".split()
+)
+
+
+def tokenize(text: str) -> list:
+    '''Lowercases and splits text into terms, keeping identifiers like "resnet-50" or "eq.3" whole.'''
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    '''
+    Incrementally updated BM25 inverted index over stored chunks, kept in SQLite next to Chroma.
+
+    Documents can be added, replaced and removed one batch at a time; postings are stored
+    per (term, doc_id), so a query only reads the posting lists of its own terms.
+    '''
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._stats = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, paper_id TEXT, length INTEGER NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc_id TEXT NOT NULL, tf INTEGER NOT NULL, '
+            'PRIMARY KEY (term, doc_id)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS docs_paper ON docs (paper_id)')
+        self._conn.commit()
+
+    def _delete(self, doc_ids: list):
+        for start in range(0, len(doc_ids), 500):
+            batch = doc_ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            self._conn.execute(f'DELETE FROM postings WHERE doc_id IN ({placeholders})', batch)
+            self._conn.execute(f'DELETE FROM docs WHERE doc_id IN ({placeholders})', batch)
+
+    def add(self, doc_ids: list, texts: list, paper_ids: list):
+        '''Adds or replaces documents in the index.'''
+        with self._lock:
+            self._delete(list(doc_ids))
+            docs, postings = [], []
+            for doc_id, text, paper_id in zip(doc_ids, texts, paper_ids):
+                terms = tokenize(text)
+                docs.append((doc_id, paper_id, len(terms)))
+                postings.extend((term, doc_id, tf) for term, tf in Counter(terms).items())
+            self._conn.executemany('INSERT INTO docs (doc_id, paper_id, length) VALUES (?, ?, ?)', docs)
+            self._conn.executemany('INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)', postings)
+            self._conn.commit()
+            self._stats = None
+
+    def remove(self, doc_ids: list):
+        '''Removes documents from the index.'''
+        with self._lock:
+            self._delete(list(doc_ids))
+            self._conn.commit()
+            self._stats = None
+
+    def count(self) -> int:
+        return self._collection_stats()[0]
+
+    def _collection_stats(self) -> tuple:
+        if self._stats is None:
+            n, avgdl = self._conn.execute('SELECT COUNT(*), AVG(length) FROM docs').fetchone()
+            self._stats = (n, avgdl or 0.0)
+        return self._stats
+
+    def search(self, query: str, top_k: int = 10, paper_id: str = None) -> list:
+        '''Returns up to top_k (doc_id, score) pairs, best first, optionally within one paper.'''
+        with self._lock:
+            n, avgdl = self._collection_stats()
+            if not n:
+                return []
+            scores = Counter()
+            for term in set(tokenize(query)):
+                df = self._conn.execute('SELECT COUNT(*) FROM postings WHERE term = ?', (term,)).fetchone()[0]
+                if not df:
+                    continue
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                sql = ('SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d ON d.doc_id = p.doc_id '
+                       'WHERE p.term = ?')
+                params = [term]
+                if paper_id is not None:
+                    sql += ' AND d.paper_id = ?'
+                    params.append(paper_id)
+                for doc_id, tf, length in self._conn.execute(sql, params):
+                    norm = self.k1 * (1 - self.b + self.b * length / avgdl)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores.most_common(top_k)
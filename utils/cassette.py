@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+
+class CassetteMiss(LookupError):
+    '''Raised in replay mode when a request was never recorded.'''
+
+
+def cassette_key(*parts) -> str:
+    '''Stable key of a request, from any JSON-serializable parts (e.g. tool name and arguments).'''
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    '''
+    Recorded responses of an external service, stored as one JSON file of {key: response}.
+
+    In replay mode only recorded responses are returned and anything else raises CassetteMiss,
+    so runs are deterministic and offline. In record mode recorded responses are still reused;
+    only new requests go to the service, and their responses are added to the file.
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_record(self, key: str, fn, record: bool = False):
+        '''Returns the response recorded under key; with record set, calls fn() and records it if there is none.'''
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        if not record:
+            raise CassetteMiss(f"No recorded response for request {key[:12]} in {self.path}")
+        value = fn()
+        with self._lock:
+            self._entries[key] = value
+            self._save()
+        return value
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+@lru_cache(maxsize=None)
+def get_cassette(path: str) -> Cassette:
+    '''The process-wide Cassette of a file, so every caller shares its entries and lock.'''
+    return Cassette(path)
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from utils.arxiv_client import normalize_arxiv_id, strip_version
+
+# Column types of the catalog CSV; fixed up front because the CSV is read in streamed blocks.
+# Years are read as floats, since pandas writes them as "2023.0" once any row has no year, and
+# stored as integers (see _int_years).
+CATALOG_SCHEMA = {
+    'entry_id': pa.string(),
+    'published_year': pa.float64(),
+    'authors': pa.string(),
+    'pdf_url': pa.string(),
+    'title': pa.string(),
+    'summary': pa.string(),
+}
+
+# Bumped when the keys in the id index change, so older indexes are rebuilt
+INDEX_VERSION = 2
+
+
+def _int_year_schema(schema: pa.Schema) -> pa.Schema:
+    index = schema.get_field_index('published_year')
+    return schema if index < 0 else schema.set(index, pa.field('published_year', pa.int64()))
+
+
+def _int_years(batch: pa.RecordBatch) -> pa.RecordBatch:
+    schema = _int_year_schema(batch.schema)
+    return pa.RecordBatch.from_arrays(
+        [column.cast(field.type) for column, field in zip(batch.columns, schema)], schema=schema
+    )
+
+
+class PaperCatalog:
+    '''
+    Columnar, memory-mapped copy of the paper catalog CSV.
+
+    The CSV is converted once (and again whenever it changes) into an Arrow IPC file, streamed
+    block by block, plus a SQLite index from entry_id / ArXiv ID to (record batch, row). Reads
+    go through a memory map, so resident memory does not grow with the catalog, and a lookup
+    by id touches a single row. Found rows are cached (up to `cache_size`) until refresh().
+    '''
+    def __init__(self, csv_path: str = 'final_data.csv', store_dir: str = './catalog_store',
+                 block_size: int = 1 << 22, cache_size: int = 4096):
+        self.csv_path = csv_path
+        self.store_dir = store_dir
+        self.block_size = block_size
+        self.arrow_path = os.path.join(store_dir, 'catalog.arrow')
+        self.index_path = os.path.join(store_dir, 'catalog_index.sqlite')
+        self._reader = None
+        self._index = None
+        self._lock = threading.Lock()
+        self.cache_size = cache_size
+        self._rows = {}
+
+    def _is_stale(self) -> bool:
+        if not (os.path.exists(self.arrow_path) and os.path.exists(self.index_path)):
+            return True
+        index = sqlite3.connect(self.index_path)
+        version = index.execute('PRAGMA user_version').fetchone()[0]
+        index.close()
+        if version != INDEX_VERSION:
+            return True
+        return os.path.exists(self.csv_path) and os.path.getmtime(self.csv_path) > os.path.getmtime(self.arrow_path)
+
+    def _convert(self):
+        '''Streams the CSV into the Arrow file and the id index, then swaps both into place.'''
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_arrow, tmp_index = f'{self.arrow_path}.tmp', f'{self.index_path}.tmp'
+        if os.path.exists(tmp_index):
+            os.remove(tmp_index)
+
+        reader = pa_csv.open_csv(
+            self.csv_path,
+            read_options=pa_csv.ReadOptions(block_size=self.block_size),
+            parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+            convert_options=pa_csv.ConvertOptions(column_types=CATALOG_SCHEMA)
+        )
+        index = sqlite3.connect(tmp_index)
+        index.execute('CREATE TABLE ids (key TEXT PRIMARY KEY, batch INTEGER NOT NULL, row INTEGER NOT NULL)')
+        index.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        rows = 0
+        with pa.OSFile(tmp_arrow, 'wb') as sink, pa.ipc.new_file(sink, _int_year_schema(reader.schema)) as writer:
+            for batch_number, batch in enumerate(reader):
+                batch = _int_years(batch)
+                writer.write_batch(batch)
+                entry_ids = batch.column('entry_id').to_pylist()
+                keys = []
+                for row, entry_id in enumerate(entry_ids):
+                    if entry_id is None:
+                        continue
+                    keys.append((entry_id, batch_number, row))
+                    keys.append((normalize_arxiv_id(entry_id), batch_number, row))
+                    keys.append((strip_version(entry_id), batch_number, row))
+                # Duplicate ids keep their first row, like a lookup over the CSV would; a bare ID
+                # maps to the first version of the paper in the catalog
+                index.executemany('INSERT OR IGNORE INTO ids (key, batch, row) VALUES (?, ?, ?)', keys)
+                rows += batch.num_rows
+        index.commit()
+        index.close()
+
+        os.replace(tmp_arrow, self.arrow_path)
+        os.replace(tmp_index, self.index_path)
+        print(f"✅ Catalog converted to columnar format: {rows} papers.")
+
+    def _open(self):
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    if self._is_stale():
+                        self._convert()
+                    self._index = sqlite3.connect(self.index_path, check_same_thread=False)
+                    self._reader = pa.ipc.open_file(pa.memory_map(self.arrow_path, 'r'))
+        return self._reader
+
+    def refresh(self):
+        '''Drops the open file handles, so the next read reconverts the CSV if it changed.'''
+        with self._lock:
+            self._reader = None
+            self._index = None
+            self._rows = {}
+
+    def __len__(self) -> int:
+        reader = self._open()
+        return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+    def iter_batches(self, batch_size: int = 1024, columns: list = None):
+        '''Yields the catalog as Arrow record batches of at most batch_size rows.'''
+        reader = self._open()
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            if columns:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+    def lookup(self, paper_id: str) -> dict:
+        '''Returns the catalog row for an entry_id or ArXiv ID, with or without its version, or None.'''
+        cached = self._rows.get(paper_id)
+        if cached is not None:
+            return cached
+        reader = self._open()
+        found = None
+        with self._lock:
+            # Exact keys first, so a versioned ID finds that version when it is in the catalog
+            for key in dict.fromkeys([paper_id, normalize_arxiv_id(paper_id), strip_version(paper_id)]):
+                found = self._index.execute('SELECT batch, row FROM ids WHERE key = ?', (key,)).fetchone()
+                if found is not None:
+                    break
+        if found is None:
+            return None
+        batch, row = found
+        record = reader.get_batch(batch).slice(row, 1).to_pylist()[0]
+        # Misses are not cached: the paper may be added to the catalog later
+        with self._lock:
+            if len(self._rows) >= self.cache_size:
+                self._rows.clear()
+            self._rows[paper_id] = record
+        return record
+
+    def lookup_many(self, paper_ids: list) -> dict:
+        '''Returns {paper_id: row} for the ids found in the catalog.'''
+        rows = {}
+        for paper_id in paper_ids:
+            row = self.lookup(paper_id)
+            if row is not None:
+                rows[paper_id] = row
+        return rows
+
+
+# Shared catalog; nothing is read until it is first used
+catalog = PaperCatalog()
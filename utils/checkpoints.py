@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sqlite3
+import time
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Types stored in the navigator state besides plain data; newer langgraph versions only
+# deserialize types that are allowlisted
+STATE_TYPES = [('langchain_core.agents', 'AgentAction')]
+
+
+def state_serializer() -> JsonPlusSerializer:
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+    except TypeError:
+        # Versions without the allowlist deserialize every type
+        return JsonPlusSerializer()
+
+
+class RunCheckpointer(SqliteSaver):
+    '''
+    SQLite checkpointer for navigator runs, usable from the graph's sync and async APIs.
+
+    LangGraph saves the state after every node, keyed by the run's thread_id, so a run that
+    fails halfway (an LLM or network error) can be resumed from its last finished node instead
+    of starting over. SqliteSaver only implements the sync methods; the async ones here run
+    them in a thread, serialized by the saver's lock. Finished runs are deleted (see
+    delete_thread), and runs not updated for `max_age` seconds are purged, so the database
+    only keeps recent runs that can still be resumed.
+    '''
+    def __init__(self, db_path: str = './checkpoints/runs.sqlite', max_age: float = 7 * 24 * 3600,
+                 purge_interval: float = 3600):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        super().__init__(conn, serde=state_serializer())
+        self.max_age = max_age
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self.setup()
+        with self.cursor() as cur:
+            cur.execute('CREATE TABLE IF NOT EXISTS run_times (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)')
+        self.purge()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        with self.cursor() as cur:
+            cur.execute(
+                'INSERT OR REPLACE INTO run_times (thread_id, updated_at) VALUES (?, ?)',
+                (str(config['configurable']['thread_id']), time.time())
+            )
+        return saved
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        for item in await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id)
+
+    def delete_thread(self, thread_id: str):
+        '''Drops every checkpoint and pending write of a run.'''
+        with self.cursor() as cur:
+            cur.execute('DELETE FROM checkpoints WHERE thread_id = ?', (thread_id,))
+            cur.execute('DELETE FROM writes WHERE thread_id = ?', (thread_id,))
+            cur.execute('DELETE FROM run_times WHERE thread_id = ?', (thread_id,))
+        if time.time() - self._last_purge > self.purge_interval:
+            self.purge()
+
+    def purge(self) -> int:
+        '''Deletes the runs that were not updated for max_age seconds; returns how many.'''
+        self._last_purge = time.time()
+        with self.cursor() as cur:
+            cutoff = time.time() - self.max_age
+            stale = [row[0] for row in cur.execute('SELECT thread_id FROM run_times WHERE updated_at < ?', (cutoff,))]
+            for table in ('checkpoints', 'writes', 'run_times'):
+                cur.executemany(f'DELETE FROM {table} WHERE thread_id = ?', [(t,) for t in stale])
+        if stale:
+            print(f"🧹 Purged {len(stale)} unfinished runs older than {self.max_age / 3600:.0f}h from the checkpoints.")
+        return len(stale)
+
+
+checkpointer = RunCheckpointer(
+    os.getenv('CHECKPOINT_PATH', './checkpoints/runs.sqlite'),
+    max_age=float(os.getenv('CHECKPOINT_MAX_AGE', str(7 * 24 * 3600)))
+)
@@ -1,134 +1,577 @@
 import chromadb
-from chromadb.utils import embedding_functions 
-import pandas as pd
-import requests
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.document_loaders import PyPDFLoader
-
-# Initialize embedding function using SentenceTransformer
-embedding_function = embedding_functions.DefaultEmbeddingFunction()
-
-# Load CSV dataset containing research papers (assumed to be in the project root)
-df = pd.read_csv('final_data.csv')
-print("dataset loaded successfully!")
-class ChromaDBHandler:
-    def __init__(self, persist_directory="./chroma_db"):
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path=persist_directory)
+import numpy as np
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+from utils.chunker import StructuredChunker
+from utils.pdf_parser import iter_pdf_pages
+from utils.http_client import get_session
+from utils.model_registry import get_embedding_function
+from utils.bm25_index import BM25Index
+from utils.catalog import catalog
+from utils.answer_cache import answer_cache
+from utils.vector_store import NumpyVectorStore, hnsw_metadata, hnsw_params_from_env
+from concurrent.futures import ThreadPoolExecutor
+from utils import tracing
+from utils.tracing import span
+
+# Shared embedding function; the model itself is loaded by the registry on first use
+embedding_function = get_embedding_function()
+
+# Columns of the catalog that feed the stored embedding and metadata of a paper
+CATALOG_COLUMNS = ["title", "summary", "pdf_url", "authors", "published_year"]
+
+
+def catalog_row_hash(row) -> str:
+    """Returns a content hash of the catalog fields that are embedded or stored for a paper."""
+    payload = "\x1f".join(str(row[c]) for c in CATALOG_COLUMNS)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-        # Create or load the collection for full research papers
-        self.paper_collection = self.client.get_or_create_collection(
-            name="research_papers",
-            embedding_function=embedding_function
+
+class CatalogManifest:
+    """
+    Small SQLite manifest of the catalog rows already indexed in the paper_collection,
+    keyed by entry_id and storing the content hash they were indexed with.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS indexed_papers (entry_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, entry_ids: list) -> dict:
+        """Returns {entry_id: content_hash} for the given ids that are already indexed."""
+        if not entry_ids:
+            return {}
+        placeholders = ",".join("?" * len(entry_ids))
+        rows = self.conn.execute(
+            f"SELECT entry_id, content_hash FROM indexed_papers WHERE entry_id IN ({placeholders})",
+            entry_ids
         )
+        return dict(rows.fetchall())
 
-        # Create or load the collection for paper chunks
-        self.chunks_collection = self.client.get_or_create_collection(
-            name="research_chunks",
-            embedding_function=embedding_function
+    def update(self, items: list):
+        """Records (entry_id, content_hash) pairs as indexed."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO indexed_papers (entry_id, content_hash) VALUES (?, ?)", items
         )
+        self.conn.commit()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM indexed_papers").fetchone()[0]
+
+
+class PDFCache:
+    """
+    Content-addressed on-disk cache of downloaded PDFs. Files are stored as <sha256>.pdf,
+    with a SQLite index from source URL to file.
+    """
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pdf_urls (url TEXT PRIMARY KEY, path TEXT NOT NULL)")
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def get(self, url: str) -> str:
+        """Returns the cached path for a URL, or an empty string."""
+        with self.lock:
+            row = self.conn.execute("SELECT path FROM pdf_urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else ""
+
+    def put(self, url: str, chunks) -> str:
+        """Streams byte chunks to disk while hashing them and returns the content-addressed path."""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    file.write(chunk)
+            path = os.path.join(self.cache_dir, f"{digest.hexdigest()}.pdf")
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO pdf_urls (url, path) VALUES (?, ?)", (url, path))
+            self.conn.commit()
+        return path
+
+
+class ChromaDBHandler:
+    def __init__(self, persist_directory="./chroma_db", catalog_batch_size=256, chunk_batch_size=64,
+                 pdf_cache_dir="./pdf_cache", vector_backend=None, quantization="int8", hnsw_params=None,
+                 paper_catalog=None, chunk_target_tokens=300, chunk_max_tokens=450):
+        # The ChromaDB client and collections are opened on first use
+        self.persist_directory = persist_directory
+        # "chroma" (default) or "numpy" (local store with int8/binary quantized vectors)
+        self.vector_backend = vector_backend or os.getenv("VECTOR_BACKEND", "chroma")
+        self.quantization = quantization
+        # HNSW settings for Chroma collections, see hnsw_metadata(); applied when a collection is created
+        self.hnsw_params = hnsw_params
+        self._client = None
+        self._collections = {}
+        self._open_lock = threading.Lock()
+        self.catalog = paper_catalog or catalog
+        self.catalog_batch_size = catalog_batch_size
+        self.chunk_batch_size = chunk_batch_size
+        self.chunker = StructuredChunker(target_tokens=chunk_target_tokens, max_tokens=chunk_max_tokens)
+
+        # The manifest and the BM25 index describe the contents of one backend's collections,
+        # so each backend keeps its own (Chroma's stay in persist_directory itself)
+        index_directory = persist_directory
+        if self.vector_backend == "numpy":
+            index_directory = os.path.join(persist_directory, "numpy_store")
+        os.makedirs(index_directory, exist_ok=True)
+
+        # Manifest of catalog rows already embedded into the paper_collection
+        self.manifest = CatalogManifest(os.path.join(index_directory, "catalog_manifest.sqlite"))
+        self._catalog_synced = False
+        # Serializes catalog indexing, which shares the manifest connection
+        self._sync_lock = threading.RLock()
+
+        # Downloaded PDFs, stored by content hash
+        self.pdf_cache = PDFCache(pdf_cache_dir)
+
+        # Serializes chunk writes coming from concurrent ingest workers
+        self.write_lock = threading.Lock()
+
+        # Keyword (BM25) index over the stored chunks, queried alongside the vectors
+        self.bm25 = BM25Index(os.path.join(index_directory, "bm25.sqlite"))
+        self._search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+    @property
+    def client(self):
+        # Initialize ChromaDB client
+        if self._client is None:
+            with self._open_lock:
+                if self._client is None:
+                    self._client = chromadb.PersistentClient(path=self.persist_directory)
+        return self._client
+
+    def _collection(self, name: str):
+        collection = self._collections.get(name)
+        if collection is None:
+            if self.vector_backend == "numpy":
+                with self._open_lock:
+                    if name not in self._collections:
+                        self._collections[name] = NumpyVectorStore(
+                            os.path.join(self.persist_directory, "numpy_store", name),
+                            quantization=self.quantization
+                        )
+                    return self._collections[name]
+            client = self.client
+            with self._open_lock:
+                if name not in self._collections:
+                    self._collections[name] = client.get_or_create_collection(
+                        name=name,
+                        embedding_function=embedding_function,
+                        metadata=hnsw_metadata(**self.hnsw_params) if self.hnsw_params else None
+                    )
+                collection = self._collections[name]
+        return collection
+
+    @property
+    def paper_collection(self):
+        """Collection for full research papers."""
+        return self._collection("research_papers")
+
+    @property
+    def chunks_collection(self):
+        """Collection for paper chunks."""
+        return self._collection("research_chunks")
+
+    def fetch_pdf(self, pdf_url: str) -> str:
+        """
+        Downloads a PDF from the given URL into the content-addressed PDF cache and returns
+        the local file path. The body is streamed to disk, and URLs already cached are not
+        downloaded again. Raises when the download fails.
+        """
+        cached = self.pdf_cache.get(pdf_url)
+        if cached and os.path.exists(cached):
+            return cached
+        with get_session().get(pdf_url, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                raise IOError(f"HTTP {response.status_code} for {pdf_url}")
+            save_path = self.pdf_cache.put(pdf_url, response.iter_content(chunk_size=1 << 16))
+        print(f"✅ PDF downloaded successfully: {save_path}")
+        return save_path
 
     def download_pdf(self, pdf_url: str) -> str:
-        """Downloads a PDF from the given URL and returns the local file path."""
-        save_path = f"{pdf_url.split('/')[-1]}.pdf"
+        """Like fetch_pdf, but prints the error and returns an empty string when the download fails."""
         try:
-            response = requests.get(pdf_url, timeout=10)
-            if response.status_code == 200:
-                with open(save_path, 'wb') as file:
-                    file.write(response.content)
-                print(f"✅ PDF downloaded successfully: {save_path}")
-                return save_path
-            else:
-                print("❌ Failed to download PDF")
-                return ""
+            return self.fetch_pdf(pdf_url)
         except Exception as e:
-            print(f"❌ Exception occurred: {e}")
+            print(f"❌ Failed to download PDF: {e}")
             return ""
 
-    def store_paper(self):
+    def store_paper(self, batch_size: int = None) -> int:
         """
-        Stores details of each research paper from the CSV into the ChromaDB paper_collection.
+        Incrementally indexes the CSV catalog into the ChromaDB paper_collection.
+
+        Only rows whose entry_id is new, or whose content hash differs from the one recorded
+        in the manifest, are embedded. Embeddings are computed and upserted in batches.
+        Concurrent calls run one after the other.
+
+        Returns:
+            int: Number of papers (re)indexed.
         """
-        for _, r in df.iterrows():
-            paper_id = str(r['entry_id'])
-            metadata = {
-                "title": r['title'],
-                "pdf_url": r['pdf_url'],
-                "authors": r['authors'],
-                "published_year": r['published_year']
-            }
-            text_to_embed = f"{r['title']} {r['summary']}"
-            embedding = embedding_function([text_to_embed])[0]  # Generate embedding
+        with self._sync_lock:
+            return self._store_paper(batch_size or self.catalog_batch_size)
+
+    def _store_paper(self, batch_size: int) -> int:
+        indexed = 0
+        for batch in self.catalog.iter_batches(batch_size, columns=["entry_id"] + CATALOG_COLUMNS):
+            rows = batch.to_pylist()
+            entry_ids = [str(r['entry_id']) for r in rows]
+            known = self.manifest.lookup(entry_ids)
+
+            ids, texts, metadatas, hashes = [], [], [], []
+            for paper_id, r in zip(entry_ids, rows):
+                content_hash = catalog_row_hash(r)
+                if known.get(paper_id) == content_hash or paper_id in ids:
+                    continue
+                ids.append(paper_id)
+                texts.append(f"{r['title']} {r['summary']}")
+                metadata = {
+                    "title": r['title'],
+                    "pdf_url": r['pdf_url'],
+                    "authors": r['authors'],
+                    "published_year": r['published_year']
+                }
+                metadatas.append({k: v for k, v in metadata.items() if v is not None})
+                hashes.append(content_hash)
+
+            if not ids:
+                continue
+            embeddings = embedding_function(texts)  # One vectorized call per batch
+            self.paper_collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+            self.manifest.update(list(zip(ids, hashes)))
+            indexed += len(ids)
+
+        self._catalog_synced = True
+        print(f"✅ Catalog indexed: {indexed} new or changed papers ({self.manifest.count()} total).")
+        return indexed
+
+    def store_chunks(self, paper_id: str, pdf_path: str) -> dict:
+        """
+        Splits a research paper PDF into chunks and stores them in the ChromaDB chunks_collection.
+
+        Pages are read lazily and chunks are embedded and upserted in batches, so peak memory is
+        bounded by one page plus one batch. Re-storing the same paper_id skips unchanged chunks.
+        """
+        with self.write_lock:
+            return self.store_page_texts(paper_id, iter_pdf_pages(pdf_path))
 
-            self.paper_collection.add(
-                ids=[paper_id],
-                embeddings=[embedding],
-                metadatas=[metadata]
+    def store_page_texts(self, paper_id: str, pages) -> dict:
+        """
+        Chunks an iterable of page texts along sections and sentences and writes them to the
+        chunks_collection in batches, each with links to its neighbours (see StructuredChunker).
+
+        Args:
+            paper_id (str): The ArXiv ID the chunks belong to.
+            pages (Iterable[str]): Page texts, in reading order.
+
+        Returns:
+            dict: Counts of 'stored', 'skipped' (unchanged) and 'removed' (stale) chunks.
+        """
+        # Hashes of the chunks already stored for this paper, used to skip unchanged ones
+        existing = self.chunks_collection.get(where={"paper_id": paper_id}, include=["metadatas"])
+        existing_hashes = {
+            chunk_id: (metadata or {}).get("content_hash")
+            for chunk_id, metadata in zip(existing.get("ids", []), existing.get("metadatas") or [])
+        }
+
+        stats = {"stored": 0, "skipped": 0, "removed": 0}
+        batch = []
+        for chunk_id, text, metadata in self.chunker.chunk_pages(paper_id, pages):
+            # The links are part of the hash, so a chunk whose neighbours changed is rewritten
+            links = f"{metadata['prev_id']}\x1f{metadata['next_id']}\x1f{metadata['section_id']}"
+            content_hash = hashlib.sha1(f"{text}\x1f{links}".encode("utf-8")).hexdigest()
+            if existing_hashes.pop(chunk_id, None) == content_hash:
+                stats["skipped"] += 1
+            else:
+                batch.append((chunk_id, text, {**metadata, "content_hash": content_hash}))
+                if len(batch) >= self.chunk_batch_size:
+                    self._write_chunk_batch(batch)
+                    stats["stored"] += len(batch)
+                    batch = []
+        if batch:
+            self._write_chunk_batch(batch)
+            stats["stored"] += len(batch)
+
+        # Chunks left over from a previous, longer version of the paper
+        if existing_hashes:
+            self.chunks_collection.delete(ids=list(existing_hashes))
+            self.bm25.remove(list(existing_hashes))
+            stats["removed"] = len(existing_hashes)
+
+        # Cached answers about this paper were built from the old chunks
+        if stats["stored"] or stats["removed"]:
+            answer_cache.invalidate(paper_id)
+
+        print(f"✅ Stored {stats['stored']} chunks for paper {paper_id} "
+              f"({stats['skipped']} unchanged, {stats['removed']} removed).")
+        return stats
+
+    def _write_chunk_batch(self, batch: list):
+        """Embeds a batch of (chunk_id, text, metadata) in one call and upserts it."""
+        ids, texts, metadatas = (list(x) for x in zip(*batch))
+        embeddings = embedding_function(texts)
+        with span("vector.upsert", chunks=len(ids), chars=sum(len(t) for t in texts)):
+            self.chunks_collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                documents=texts
             )
-        print("✅ All papers stored in ChromaDB paper_collection.")
-
-    def store_chunks(self, paper_id: str, pdf_path: str):
-        """
-        Downloads and splits a research paper PDF into chunks and stores them in the ChromaDB chunks_collection.
-        """
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=512, chunk_overlap=64)
-        chunks = text_splitter.split_documents(documents)
-        
-        # Store each chunk in the collection
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{paper_id}_chunk_{i}"
-            embedding = embedding_function([chunk.page_content])[0]
-            metadata = {"paper_id": paper_id, "chunk_index": i}
-            self.chunks_collection.add(
-                ids=[chunk_id],
-                embeddings=[embedding],
-                metadatas=[metadata],
-                documents=[chunk.page_content]
+            self.bm25.add(ids, texts, [m["paper_id"] for m in metadatas])
+
+    def rebuild_bm25(self, page_size: int = 1000):
+        """Indexes every chunk already in the chunks_collection into the BM25 index."""
+        offset = 0
+        while True:
+            page = self.chunks_collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.bm25.add(page["ids"], page["documents"], [m["paper_id"] for m in page["metadatas"]])
+            offset += len(page["ids"])
+        print(f"✅ BM25 index rebuilt over {offset} chunks.")
+
+    def retrieve_batch(self, query_texts: list, top_k: int = 5, collection: str = "chunks", where: dict = None,
+                       offset: int = 0, mmr: bool = False, mmr_lambda: float = 0.5, fetch_k: int = None) -> dict:
+        """
+        Serves several queries with one embedding call and one multi-embedding Chroma query.
+
+        Results of all queries are merged and deduplicated by id (keeping the best distance).
+        `offset` pages through the merged ranking; with `mmr`, the top_k results are instead
+        picked from `fetch_k` candidates by maximal marginal relevance for diversity.
+
+        Returns:
+            dict: Flat lists of 'ids', 'documents', 'metadatas' and 'distances', best first.
+        """
+        target = self.chunks_collection if collection == "chunks" else self.paper_collection
+        query_embeddings = embedding_function(list(query_texts))
+        n_results = max(fetch_k or 0, top_k * 4) if mmr else offset + top_k
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if mmr else [])
+        with span("vector.query", collection=collection, queries=len(query_embeddings), n_results=n_results,
+                  filtered=where is not None) as current:
+            results = target.query(query_embeddings=query_embeddings, n_results=n_results, where=where, include=include)
+            current.set(returned=sum(len(ids) for ids in results.get("ids") or []))
+
+        best = {}
+        for q in range(len(results.get("ids") or [])):
+            for i, doc_id in enumerate(results["ids"][q]):
+                distance = results["distances"][q][i]
+                if doc_id not in best or distance < best[doc_id]["distance"]:
+                    best[doc_id] = {
+                        "document": results["documents"][q][i],
+                        "metadata": results["metadatas"][q][i],
+                        "distance": distance,
+                        "embedding": results["embeddings"][q][i] if mmr else None
+                    }
+
+        ranked = sorted(best, key=lambda doc_id: best[doc_id]["distance"])
+        if mmr and ranked:
+            ranked = mmr_select(
+                query_embeddings, [best[doc_id]["embedding"] for doc_id in ranked], ranked, top_k, mmr_lambda
+            )
+        else:
+            ranked = ranked[offset:offset + top_k]
+        return {
+            "ids": ranked,
+            "documents": [best[doc_id]["document"] for doc_id in ranked],
+            "metadatas": [best[doc_id]["metadata"] for doc_id in ranked],
+            "distances": [best[doc_id]["distance"] for doc_id in ranked]
+        }
+
+    def hybrid_search(self, query_text, top_k: int = 5, paper_id: str = None, candidate_k: int = 20,
+                      rrf_k: int = 60, dense_weight: float = 1.0, keyword_weight: float = 1.0) -> dict:
+        """
+        Retrieves chunks by fusing dense (Chroma) and keyword (BM25) rankings with weighted
+        reciprocal rank fusion. Both sides are queried in parallel. `query_text` may be a single
+        query or a list of sub-queries, which share one embedding call and one Chroma query.
+
+        Every query gets its own dense and keyword ranking, and each side's weight is split
+        over its rankings, so neither side dominates however many sub-queries there are. The
+        top hit of every ranking is always returned (as far as top_k allows): an exact-term
+        match that only BM25 finds is not pushed out by documents that rank mid-list on both
+        sides.
+
+        Returns:
+            dict: Flat lists of 'ids', 'documents', 'metadatas' and fused 'scores', best first.
+        """
+        queries = [query_text] if isinstance(query_text, str) else list(query_text)
+        weights = (dense_weight, keyword_weight)
+        with span("retrieval.hybrid", queries=len(queries), top_k=top_k, filtered=paper_id is not None) as current:
+            result = self._hybrid_search(queries, top_k, paper_id, candidate_k, rrf_k, weights)
+            current.set(returned=len(result["ids"]), result_chars=sum(len(d or "") for d in result["documents"]))
+            return result
+
+    def _keyword_search(self, query: str, top_k: int, paper_id: str = None) -> list:
+        with span("bm25.search", top_k=top_k, filtered=paper_id is not None):
+            return self.bm25.search(query, top_k, paper_id)
+
+    def _dense_rankings(self, queries: list, top_k: int, where: dict = None) -> list:
+        """One ranked id list per query, from one embedding call and one Chroma query."""
+        query_embeddings = embedding_function(list(queries))
+        with span("vector.query", collection="chunks", queries=len(query_embeddings), n_results=top_k,
+                  filtered=where is not None) as current:
+            results = self.chunks_collection.query(
+                query_embeddings=query_embeddings, n_results=top_k, where=where, include=["distances"]
             )
-        print(f"✅ Stored {len(chunks)} chunks for paper {paper_id}.")
+            current.set(returned=sum(len(ids) for ids in results.get("ids") or []))
+        return results.get("ids") or []
+
+    def _hybrid_search(self, queries: list, top_k: int, paper_id: str, candidate_k: int, rrf_k: int,
+                       weights: tuple) -> dict:
+        if self.bm25.count() == 0 and self.chunks_collection.count() > 0:
+            self.rebuild_bm25()
+
+        where = {"paper_id": paper_id} if paper_id else None
+        dense_future = tracing.submit(self._search_pool, self._dense_rankings, queries, candidate_k, where)
+        keyword_futures = [
+            tracing.submit(self._search_pool, self._keyword_search, query, candidate_k, paper_id) for query in queries
+        ]
+        sides = [
+            (weights[0], dense_future.result()),
+            (weights[1], [[doc_id for doc_id, _ in f.result()] for f in keyword_futures]),
+        ]
+
+        fused, leaders = {}, []
+        for weight, rankings in sides:
+            for ranking in rankings:
+                for rank, doc_id in enumerate(ranking):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + weight / len(rankings) / (rrf_k + rank + 1)
+                if ranking and weight > 0:
+                    leaders.append(ranking[0])
+        leaders = sorted(set(leaders), key=fused.get, reverse=True)[:top_k]
+        top_ids = leaders + [doc_id for doc_id in sorted(fused, key=fused.get, reverse=True) if doc_id not in leaders]
+        top_ids = sorted(top_ids[:top_k], key=fused.get, reverse=True)
+        if not top_ids:
+            return {"ids": [], "documents": [], "metadatas": [], "scores": []}
+
+        found = self.chunks_collection.get(ids=top_ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: (document, metadata)
+            for doc_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+        }
+        top_ids = [doc_id for doc_id in top_ids if doc_id in by_id]
+        return {
+            "ids": top_ids,
+            "documents": [by_id[doc_id][0] for doc_id in top_ids],
+            "metadatas": [by_id[doc_id][1] for doc_id in top_ids],
+            "scores": [fused[doc_id] for doc_id in top_ids]
+        }
+
+    def expand_context(self, results: dict, neighbor_weight: float = 0.5) -> dict:
+        """
+        Adds the previous and next chunk of every hit, found through the links stored in the
+        hits' metadata with a single get by id (no further vector query). Neighbours get
+        `neighbor_weight` times the score of the hit they were reached from.
+
+        Args:
+            results (dict): Flat lists of 'ids', 'documents', 'metadatas' and 'scores' (e.g. from hybrid_search).
+
+        Returns:
+            dict: The same lists with the neighbours appended.
+        """
+        ids = list(results.get("ids") or [])
+        scores = list(results.get("scores") or [1.0 / (rank + 1) for rank in range(len(ids))])
+        neighbor_scores = {}
+        for metadata, score in zip(results.get("metadatas") or [], scores):
+            for key in ("prev_id", "next_id"):
+                neighbor_id = (metadata or {}).get(key)
+                if neighbor_id and neighbor_id not in ids:
+                    neighbor_scores[neighbor_id] = max(neighbor_scores.get(neighbor_id, 0.0), score * neighbor_weight)
+        if not neighbor_scores:
+            return results
+
+        with span("vector.get", ids=len(neighbor_scores)):
+            found = self.chunks_collection.get(ids=list(neighbor_scores), include=["documents", "metadatas"])
+        return {
+            "ids": ids + list(found["ids"]),
+            "documents": list(results["documents"]) + list(found["documents"]),
+            "metadatas": list(results["metadatas"]) + list(found["metadatas"]),
+            "scores": scores + [neighbor_scores[doc_id] for doc_id in found["ids"]]
+        }
+
+    def sync_catalog(self):
+        """Indexes the catalog once per process (see store_paper); concurrent callers wait for the first."""
+        if not self._catalog_synced:
+            with self._sync_lock:
+                if not self._catalog_synced:
+                    self.store_paper()
 
     def retrieve_relevant_papers(self, query_text: str, top_k: int = 5) -> list:
         """
         Retrieves the most relevant full papers from the ChromaDB paper_collection based on the query.
         """
-        self.store_paper()
-        query_embedding = embedding_function([query_text])[0]
-        results = self.paper_collection.query(query_embeddings=[query_embedding], n_results=top_k)
-        if not results.get('ids'):
-            return []
-        relevant_papers = []
-        for i in range(len(results['ids'][0])):
-            paper_info = {
-                'id': results['ids'][0][i],
-                'pdf_url': results['metadatas'][0][i].get('pdf_url', ''),
-                'title': results['metadatas'][0][i].get('title', '')
+        self.sync_catalog()
+        results = self.retrieve_batch([query_text], top_k=top_k, collection="papers")
+        return [
+            {
+                'id': paper_id,
+                'pdf_url': metadata.get('pdf_url', ''),
+                'title': metadata.get('title', '')
             }
-            relevant_papers.append(paper_info)
-        return relevant_papers
+            for paper_id, metadata in zip(results['ids'], results['metadatas'])
+        ]
 
     def retrieve_research_chunks(self, query_text: str, top_k: int = 5, iterations: int = 1) -> list:
         """
         Retrieves the most relevant chunks from the ChromaDB chunks_collection based on the query.
+        Each of the `iterations` entries holds the paper IDs of the next page of top_k chunks,
+        all served by a single query.
         """
-        
-        query_embedding = embedding_function([query_text])[0]
+        results = self.retrieve_batch([query_text], top_k=top_k * iterations)
         all_chunks = []
-        retrieved_ids = set()
-        for _ in range(iterations):
-            results = self.chunks_collection.query(query_embeddings=[query_embedding], n_results=top_k)
-            if results.get("ids"):
-                new_chunks = []
-                for i in range(len(results["ids"][0])):
-                    chunk_id = results["ids"][0][i]
-                    if chunk_id not in retrieved_ids:
-                        retrieved_ids.add(chunk_id)
-                        new_chunks.append(results["metadatas"][0][i]["paper_id"])
-                if new_chunks:  # Only add non-empty results
-                    all_chunks.append("\n".join(new_chunks))
+        for start in range(0, len(results["ids"]), top_k):
+            page = results["metadatas"][start:start + top_k]
+            all_chunks.append("\n".join(metadata["paper_id"] for metadata in page))
         return all_chunks
 
+
+def mmr_select(query_embeddings, candidate_embeddings, candidate_ids: list, k: int, mmr_lambda: float = 0.5) -> list:
+    """Picks k candidates by maximal marginal relevance: relevant to any query, but unlike each other."""
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    queries = np.asarray(query_embeddings, dtype=np.float32)
+    candidates /= np.linalg.norm(candidates, axis=1, keepdims=True) + 1e-12
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+    relevance = (candidates @ queries.T).max(axis=1)
+
+    selected = []
+    redundancy = np.zeros(len(candidate_ids), dtype=np.float32)
+    available = np.ones(len(candidate_ids), dtype=bool)
+    for _ in range(min(k, len(candidate_ids))):
+        scores = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(candidate_ids[best])
+        available[best] = False
+        redundancy = np.maximum(redundancy, candidates @ candidates[best])
+    return selected
+
+
 # Initialize ChromaDB handler for use in other modules
-chroma_db = ChromaDBHandler()
+# VECTOR_QUANTIZATION applies to the numpy backend: int8 (default), binary or none;
+# the HNSW_* variables configure new Chroma collections (see hnsw_params_from_env)
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "int8")
+chroma_db = ChromaDBHandler(
+    persist_directory=os.getenv("CHROMA_DB_PATH", "./chroma_db"),
+    pdf_cache_dir=os.getenv("PDF_CACHE_PATH", "./pdf_cache"),
+    quantization=None if VECTOR_QUANTIZATION == "none" else VECTOR_QUANTIZATION,
+    hnsw_params=hnsw_params_from_env()
+)
 print("✅ ChromaDB retrieval pipeline successfully created!")
+
+if __name__ == "__main__":
+    # Catalog ingestion mode: python -m utils.chromadb_handler [batch_size]
+    import sys
+    chroma_db.store_paper(batch_size=int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,164 @@
+import re
+from navigator.scratchpad import estimate_tokens
+
+# Headings as they come out of PDF text extraction: "3 Method", "2.1 Training Setup", "IV. RESULTS"
+# or a bare well-known section name on its own line. Section numbers are short ("12", "3.2.1"),
+# which keeps years and counts at the start of a wrapped line ("2019 IEEE ...", "8 GPUs ...") out.
+_SECTION_NUMBER = r"(?:\d{1,2}(?:\.\d{1,2}){0,2}|[IVX]+)"
+_NUMBERED_HEADING = re.compile(rf"^{_SECTION_NUMBER}\.?\s+[A-Z][A-Za-z0-9 ,:&()/-]{{1,80}}$")
+# A wrapped line of running text, not a heading, ends on one of these
+_CONTINUATIONS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "with"}
+_KNOWN_SECTIONS = (
+    "abstract", "introduction", "background", "related work", "method", "methods", "methodology",
+    "approach", "experiments", "experimental setup", "results", "evaluation", "discussion",
+    "limitations", "conclusion", "conclusions", "future work", "acknowledgments", "acknowledgements",
+    "references", "bibliography", "appendix",
+)
+# Sentence ends, except after author initials and common abbreviations in papers ("et al.", "Fig.", "e.g.")
+_SENTENCE_END = re.compile(
+    r"(?<![\s(\[][A-Z]\.)(?<!\bet al\.)(?<!\bFig\.)(?<!\bEq\.)(?<!\be\.g\.)(?<!\bi\.e\.)(?<!\bvs\.)(?<!\bSec\.)(?<!\bTab\.)"
+    r"(?<=[.!?])\s+(?=[A-Z0-9(\[])"
+)
+_EQUATION_NUMBER = re.compile(r"\(\d+[a-z]?\)\s*$")
+
+
+def is_heading(line: str, after_sentence_end: bool = True) -> bool:
+    '''
+    True for a section heading. Well-known section names are accepted anywhere; other numbered
+    headings only when the text before them ended a sentence (`after_sentence_end`), since a
+    line that starts with a number mid-sentence is a wrapped line of running text.
+    '''
+    line = line.strip()
+    if not line or len(line) > 90 or line.endswith(('.', ',', ';')):
+        return False
+    bare = re.sub(rf"^{_SECTION_NUMBER}\.?\s+", "", line).lower()
+    if bare in _KNOWN_SECTIONS:
+        return True
+    if not after_sentence_end or line.split()[-1].lower() in _CONTINUATIONS:
+        return False
+    return bool(_NUMBERED_HEADING.match(line)) and len(line.split()) <= 10
+
+
+def is_equation(line: str) -> bool:
+    '''Display math or similar: mostly symbols, or ends with an equation number like "(3)".'''
+    line = line.strip()
+    if not line:
+        return False
+    if _EQUATION_NUMBER.search(line) and len(line) < 200:
+        return True
+    symbols = sum(not (c.isalnum() or c.isspace()) for c in line)
+    return len(line) >= 8 and symbols / len(line) > 0.3
+
+
+class StructuredChunker:
+    '''
+    Section- and sentence-aware chunker for paper text.
+
+    Pages are read line by line: headings start a new section, display equations are kept
+    whole, and running text is split into sentences. Sentences are packed into chunks of about
+    `target_tokens` (never more than `max_tokens`, unless a single sentence is longer, which is
+    then split on words). A chunk never spans two sections unless the earlier part is shorter
+    than `min_tokens`, so section titles stay with their text; such a chunk is labelled with
+    the section most of its text belongs to. Chunks do not overlap; neighbours are reachable
+    through the links added by `chunk_pages`.
+    '''
+    def __init__(self, target_tokens: int = 300, max_tokens: int = 450, min_tokens: int = 60):
+        self.target_tokens = target_tokens
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    def _units(self, pages):
+        '''Yields (page, section, text, is_heading) units in reading order.'''
+        section = ""
+        # Whether the running text read so far ended a sentence; kept across page breaks
+        sentence_ended = True
+        for page_number, page_text in enumerate(pages):
+            paragraph = []
+            for line in page_text.splitlines() + [""]:
+                stripped = line.strip()
+                heading = is_heading(stripped, sentence_ended)
+                if paragraph and (not stripped or heading or is_equation(stripped)):
+                    text = re.sub(r"-\s+(?=[a-z])", "", " ".join(paragraph))  # re-join hyphenated words
+                    for sentence in _SENTENCE_END.split(text):
+                        if sentence.strip():
+                            yield page_number, section, sentence.strip(), False
+                    paragraph = []
+                if not stripped:
+                    continue
+                if heading:
+                    section = stripped
+                    sentence_ended = True
+                    yield page_number, section, stripped, True
+                elif is_equation(stripped):
+                    sentence_ended = True
+                    yield page_number, section, stripped, False
+                else:
+                    paragraph.append(stripped)
+                    sentence_ended = stripped.endswith(('.', '!', '?', ':'))
+
+    def _split_long(self, text: str) -> list:
+        words, parts, current = text.split(), [], []
+        for word in words:
+            if current and estimate_tokens(" ".join(current + [word])) > self.max_tokens:
+                parts.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            parts.append(" ".join(current))
+        return parts
+
+    def split(self, pages):
+        '''Yields chunks as {'text', 'page', 'section'} dicts, in reading order.'''
+        current, tokens, page = [], 0, None
+        # Tokens of the current chunk per section; the chunk is labelled with the largest
+        sections = {}
+
+        def chunk() -> dict:
+            return {"text": " ".join(current), "page": page, "section": max(sections, key=sections.get)}
+
+        for unit_page, unit_section, text, heading in self._units(pages):
+            new_section = bool(heading and current)
+            if current and ((new_section and tokens >= self.min_tokens)
+                            or tokens + estimate_tokens(text) > self.max_tokens
+                            or tokens >= self.target_tokens):
+                yield chunk()
+                current, tokens, sections = [], 0, {}
+            if not current:
+                page = unit_page
+            for part in self._split_long(text) if estimate_tokens(text) > self.max_tokens else [text]:
+                if current and tokens + estimate_tokens(part) > self.max_tokens:
+                    yield chunk()
+                    current, tokens, sections, page = [], 0, {}, unit_page
+                current.append(part)
+                tokens += estimate_tokens(part) + 1
+                sections[unit_section] = sections.get(unit_section, 0) + estimate_tokens(part) + 1
+        if current:
+            yield chunk()
+
+    def chunk_pages(self, paper_id: str, pages):
+        '''
+        Yields (chunk_id, text, metadata) for every chunk of a paper. The metadata links each chunk
+        to its neighbours (prev_id, next_id) and to the first chunk of its section (section_id),
+        so context can be expanded by id. Chunks are produced one ahead of the one yielded, which
+        keeps the stream lazy while next_id is known.
+        '''
+        previous = None
+        section_ids = {}
+        for index, chunk in enumerate(self.split(pages)):
+            chunk_id = f"{paper_id}_chunk_{index}"
+            section_ids.setdefault(chunk["section"], chunk_id)
+            metadata = {
+                "paper_id": paper_id,
+                "chunk_index": index,
+                "page": chunk["page"],
+                "section": chunk["section"],
+                "section_id": section_ids[chunk["section"]],
+                "prev_id": previous[0] if previous else "",
+                "next_id": "",
+            }
+            if previous:
+                previous[2]["next_id"] = chunk_id
+                yield previous
+            previous = (chunk_id, chunk["text"], metadata)
+        if previous:
+            yield previous
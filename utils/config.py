@@ -1,10 +1,24 @@
 import os
+import sys
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(), override=True)
 from getpass import getpass
 
-serpapi_params = {
-    'engine': 'google',  
-    'api_key': os.getenv('SERP_API_KEY') or getpass('SerpAPI key: ')  # Get the API key securely.
-}
+def get_api_key(name: str, prompt: str) -> str:
+    '''
+    Returns an API key from the environment. It is only prompted for when first needed and
+    only in an interactive terminal, so servers and background workers never block on input.
+    '''
+    value = os.getenv(name)
+    if not value and sys.stdin is not None and sys.stdin.isatty():
+        value = getpass(prompt)  # Get the API key securely.
+        os.environ[name] = value
+    if not value:
+        raise RuntimeError(f"{name} is not set")
+    return value
 
+def serpapi_params() -> dict:
+    return {
+        'engine': 'google',
+        'api_key': get_api_key('SERP_API_KEY', 'SerpAPI key: ')
+    }
@@ -0,0 +1,100 @@
+from navigator.scratchpad import estimate_tokens
+from utils.catalog import catalog
+
+
+def paper_metadata(paper_id: str, paper_catalog=catalog) -> dict:
+    '''Catalog row of a paper (title, authors, year, ...); empty if it is not in the catalog (yet).'''
+    try:
+        return paper_catalog.lookup(paper_id) or {}
+    except OSError:
+        return {}
+
+
+def _join(previous: str, text: str, max_overlap: int = 200) -> str:
+    '''Joins two consecutive chunks, dropping the text they share because of the splitter overlap.'''
+    for size in range(min(len(previous), len(text), max_overlap), 9, -1):
+        if previous.endswith(text[:size]):
+            return previous + text[size:]
+    return f"{previous} {text}"
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    limit = max(tokens, 0) * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    # Prefer ending on a sentence boundary
+    end = cut.rfind('. ')
+    return (cut[:end + 1] if end > limit // 2 else cut) + ' ...'
+
+
+def _paper_header(paper_id: str, paper_catalog) -> str:
+    row = paper_metadata(paper_id, paper_catalog)
+    lines = [f"Title: {row.get('title') or 'Unknown'}"]
+    if row.get('authors'):
+        year = f" ({row['published_year']})" if row.get('published_year') else ''
+        lines.append(f"Authors: {row['authors']}{year}")
+    lines.append(f"ArXiv ID: {paper_id}")
+    return '\n'.join(lines)
+
+
+def pack_contexts(results: dict, token_budget: int = 900, paper_catalog=catalog) -> str:
+    """
+    Packs retrieved chunks into a context of at most about `token_budget` tokens.
+
+    Chunks are taken greedily by relevance score (or rank, if there are no scores) while they
+    fit in the budget. The selected chunks are then grouped by paper under one header with the
+    paper's catalog metadata, and runs of consecutive chunk_index values are merged into a
+    single passage, so the model gets whole passages instead of overlapping fragments.
+
+    Args:
+        results (dict): Flat lists of 'ids', 'documents', 'metadatas' and optionally 'scores'.
+        token_budget (int): Approximate size limit of the packed context.
+        paper_catalog (PaperCatalog): Where paper titles and authors are looked up.
+
+    Returns:
+        str: Papers separated by '---', most relevant first.
+    """
+    ids = results.get("ids") or []
+    if not ids:
+        return "No relevant documents found."
+    documents = results.get("documents") or []
+    metadatas = results.get("metadatas") or []
+    scores = results.get("scores") or [-rank for rank in range(len(ids))]
+
+    order = sorted(range(len(ids)), key=lambda i: scores[i], reverse=True)
+    remaining = token_budget
+    papers = {}  # paper_id -> selected chunks; insertion order is the paper's best rank
+    for i in order:
+        metadata = metadatas[i] or {}
+        paper_id = metadata.get("paper_id", "N/A")
+        cost = estimate_tokens(documents[i])
+        if paper_id not in papers:
+            cost += estimate_tokens(_paper_header(paper_id, paper_catalog))
+        if cost > remaining:
+            if papers:
+                continue
+            # Not even the best chunk fits: keep what the budget allows of it
+            documents = list(documents)
+            documents[i] = _truncate_to_tokens(documents[i], remaining - (cost - estimate_tokens(documents[i])))
+            cost = remaining
+        papers.setdefault(paper_id, []).append((metadata.get("chunk_index", 0), metadata.get("page"), documents[i]))
+        remaining -= cost
+
+    sections = []
+    for paper_id, chunks in papers.items():
+        passages = []
+        for chunk_index, page, text in sorted(chunks, key=lambda c: c[0]):
+            if passages and chunk_index == passages[-1]["last"] + 1:
+                passages[-1]["text"] = _join(passages[-1]["text"], text)
+                passages[-1]["last"] = chunk_index
+            else:
+                passages.append({"first": chunk_index, "last": chunk_index, "page": page, "text": text})
+        body = []
+        for p in passages:
+            label = f"chunk {p['first']}" if p["first"] == p["last"] else f"chunks {p['first']}-{p['last']}"
+            if p["page"] is not None:
+                label += f", page {p['page'] + 1}"
+            body.append(f"[{label}]\n{p['text']}")
+        sections.append(_paper_header(paper_id, paper_catalog) + "\n" + "\n\n".join(body))
+    return "\n---\n".join(sections)
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from utils.tracing import span
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    '''
+    Caching wrapper around an embedding function.
+
+    Embeddings are keyed by (model id, text hash) and looked up first in an in-process LRU,
+    then in an on-disk SQLite store. Only texts missing from both are sent to the model, in
+    one batch. Both tiers are size-bounded and evict least recently used entries.
+    '''
+    def __init__(self, base, model_id: str, db_path: str = './embedding_cache/embeddings.sqlite',
+                 max_memory_items: int = 10000, max_disk_items: int = 500000):
+        self.base = base
+        self.model_id = model_id
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings '
+            '(key TEXT PRIMARY KEY, model_id TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)')
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f'{self.model_id}\x00{text}'.encode('utf-8')).hexdigest()
+
+    def __call__(self, input):
+        with span('embedding.batch', model_id=self.model_id, texts=len(input),
+                  chars=sum(len(text) for text in input)) as current:
+            return self._embed(input, current)
+
+    def _embed(self, input, current):
+        keys = [self._key(text) for text in input]
+        results = [None] * len(keys)
+
+        with self._lock:
+            # 1) In-process LRU
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[i] = vector
+                    self.hits += 1
+
+            # 2) On-disk store
+            missing = [i for i, r in enumerate(results) if r is None]
+            if missing:
+                found = self._disk_get(list({keys[i] for i in missing}))
+                for i in missing:
+                    if keys[i] in found:
+                        results[i] = found[keys[i]]
+                        self._remember(keys[i], results[i])
+                        self.disk_hits += 1
+
+        # 3) Model inference for the rest, as a single batch (outside the lock)
+        missing = [i for i, r in enumerate(results) if r is None]
+        current.set(cache_hits=len(keys) - len(missing), cache_misses=len(missing))
+        if missing:
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], input[i])
+            with span('embedding.model', model_id=self.model_id, texts=len(unique)):
+                computed = self.base(list(unique.values()))
+            vectors = dict(zip(unique, (np.asarray(v, dtype=np.float32) for v in computed)))
+            with self._lock:
+                self.misses += len(missing)
+                for key, vector in vectors.items():
+                    self._remember(key, vector)
+                self._disk_put(vectors)
+            for i in missing:
+                results[i] = vectors[keys[i]]
+
+        return results
+
+    def _remember(self, key: str, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, keys: list) -> dict:
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        if found:
+            now = time.time()
+            self._conn.executemany('UPDATE embeddings SET last_access = ? WHERE key = ?',
+                                   [(now, key) for key in found])
+            self._conn.commit()
+        return found
+
+    def _disk_put(self, vectors: dict):
+        now = time.time()
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO embeddings (key, model_id, vector, last_access) VALUES (?, ?, ?, ?)',
+            [(key, self.model_id, vector.tobytes(), now) for key, vector in vectors.items()]
+        )
+        self._writes_since_evict += len(vectors)
+        # Evict in bulk once in a while instead of counting rows on every write
+        if self._writes_since_evict >= max(self.max_disk_items // 100, 1):
+            self._writes_since_evict = 0
+            overflow = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0] - self.max_disk_items
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM embeddings WHERE key IN '
+                    '(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)', (overflow,)
+                )
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        '''Returns hit/miss counters and the current size of both cache tiers.'''
+        with self._lock:
+            disk_items = self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+            return {
+                'model_id': self.model_id,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_items': len(self._memory),
+                'disk_items': disk_items,
+            }
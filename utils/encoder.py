@@ -1,10 +1,9 @@
-#from sentence_transformers import SentenceTransformer
-from chromadb.utils import embedding_functions
-# Load a sentence-transformer model
-#model = SentenceTransformer("all-MiniLM-L6-v2")
-from chromadb.utils import embedding_functions
-default_ef = embedding_functions.DefaultEmbeddingFunction()
+import numpy as np
+from utils.model_registry import get_embedding_function
+
+# Shares the process-wide embedding model with the ChromaDB handler and RAG tools
+default_ef = get_embedding_function()
 
 def encoder(texts: list) -> list:
     '''Encodes a list of texts into vector embeddings.'''
-    return default_ef.encode(texts, convert_to_numpy=True)
+    return np.array(default_ef(texts))
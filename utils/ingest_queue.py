@@ -0,0 +1,132 @@
+import argparse
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from utils.arxiv_client import normalize_arxiv_id
+from utils.chromadb_handler import chroma_db
+from utils.pdf_parser import parse_pdf_pages
+
+
+class BulkIngestJob:
+    '''
+    Downloads, parses and stores many papers at once.
+
+    Downloads run in a bounded thread pool over the shared keep-alive session, PDF parsing runs
+    in a process pool, and parsed pages are fed to the batched chunk writer one paper at a time.
+    The job runs on a background thread; poll `progress()` or pass `on_progress` to follow it.
+
+    Parse workers are spawned rather than forked: jobs start in processes that already run other
+    threads and hold a loaded embedding model, whose locks a fork would copy mid-use.
+    '''
+    def __init__(self, papers: list, download_workers: int = 8, parse_workers: int = 2, on_progress=None):
+        # papers: list of {'id': ..., 'pdf_url': ...}, e.g. a retrieve_relevant_papers result
+        self.papers = [
+            {'id': normalize_arxiv_id(p['id']), 'pdf_url': p['pdf_url']} for p in papers
+        ]
+        self.download_workers = download_workers
+        self.parse_workers = parse_workers
+        self.on_progress = on_progress
+        self._status = {p['id']: {'status': 'queued', 'detail': ''} for p in self.papers}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self) -> 'BulkIngestJob':
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float = None) -> dict:
+        self._thread.join(timeout)
+        return self.progress()
+
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def progress(self) -> dict:
+        '''Returns {paper_id: {'status', 'detail'}} for every paper in the job.'''
+        with self._lock:
+            return {k: dict(v) for k, v in self._status.items()}
+
+    def _set(self, paper_id: str, status: str, detail: str = ''):
+        with self._lock:
+            self._status[paper_id] = {'status': status, 'detail': detail}
+        if self.on_progress:
+            self.on_progress(paper_id, status, detail)
+
+    def _download(self, paper: dict) -> str:
+        self._set(paper['id'], 'downloading')
+        return chroma_db.fetch_pdf(paper['pdf_url'])
+
+    def _run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.download_workers) as downloads, \
+                    ProcessPoolExecutor(max_workers=self.parse_workers,
+                                        mp_context=multiprocessing.get_context('spawn')) as parsers:
+                pending = {downloads.submit(self._download, p): ('download', p) for p in self.papers}
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        stage, paper = pending.pop(future)
+                        if stage == 'download':
+                            pdf_path = self._result(future, paper, 'download')
+                            if pdf_path:
+                                self._set(paper['id'], 'parsing', pdf_path)
+                                pending[parsers.submit(parse_pdf_pages, pdf_path)] = ('parse', paper)
+                        else:
+                            pages = self._result(future, paper, 'parse')
+                            if pages is not None:
+                                self._store(paper, pages)
+        finally:
+            self.finished_at = time.time()
+
+    def _result(self, future, paper: dict, stage: str):
+        try:
+            return future.result()
+        except Exception as e:
+            self._set(paper['id'], 'failed', f'{stage} error: {e}')
+            return None
+
+    def _store(self, paper: dict, pages: list):
+        # Chunk writes go through the handler one paper at a time
+        self._set(paper['id'], 'storing')
+        try:
+            with chroma_db.write_lock:
+                stats = chroma_db.store_page_texts(paper['id'], pages)
+            self._set(paper['id'], 'done', f"{stats['stored']} stored, {stats['skipped']} unchanged")
+        except Exception as e:
+            self._set(paper['id'], 'failed', f'store error: {e}')
+
+
+def bulk_ingest(papers: list, **kwargs) -> BulkIngestJob:
+    '''Starts a background BulkIngestJob for the given papers and returns it.'''
+    return BulkIngestJob(papers, **kwargs).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download and store many papers into the knowledge base.')
+    parser.add_argument('query', help='Research query used to select papers from the catalog.')
+    parser.add_argument('--top-k', type=int, default=20)
+    parser.add_argument('--download-workers', type=int, default=8)
+    parser.add_argument('--parse-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    papers = chroma_db.retrieve_relevant_papers(query_text=args.query, top_k=args.top_k)
+    job = bulk_ingest(
+        papers,
+        download_workers=args.download_workers,
+        parse_workers=args.parse_workers,
+        on_progress=lambda paper_id, status, detail: print(f"[{status}] {paper_id} {detail}")
+    )
+    results = job.wait()
+    failed = [k for k, v in results.items() if v['status'] == 'failed']
+    print(f"✅ Ingested {len(results) - len(failed)}/{len(results)} papers "
+          f"in {job.finished_at - job.started_at:.1f}s.")
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from chromadb.utils import embedding_functions
+from utils.embedding_cache import CachedEmbeddingFunction
+
+DEFAULT_MODEL_ID = 'all-MiniLM-L6-v2'
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', './embedding_cache/embeddings.sqlite')
+
+# Factories for the embedding models the project knows how to build
+_factories = {
+    DEFAULT_MODEL_ID: embedding_functions.DefaultEmbeddingFunction,
+}
+_models = {}
+_registry_lock = threading.Lock()
+
+
+class LazyEmbeddingModel:
+    '''Builds an embedding model on its first call and records how long loading took.'''
+    def __init__(self, model_id: str, factory):
+        self.model_id = model_id
+        self.factory = factory
+        self.model = None
+        self.load_seconds = None
+        self.first_call_seconds = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self.model is None:
+                start = time.perf_counter()
+                self.model = self.factory()
+                self.load_seconds = time.perf_counter() - start
+                print(f"✅ Embedding model {self.model_id} loaded in {self.load_seconds:.2f}s")
+        return self.model
+
+    def __call__(self, texts):
+        model = self.model or self._load()
+        if self.first_call_seconds is None:
+            # The first inference includes lazy weight loading inside the model itself
+            start = time.perf_counter()
+            result = model(texts)
+            self.first_call_seconds = time.perf_counter() - start
+            return result
+        return model(texts)
+
+
+def register_model(model_id: str, factory):
+    '''Registers a factory for an embedding model. Nothing is loaded until the model is first used.'''
+    with _registry_lock:
+        _factories[model_id] = factory
+        _models.pop(model_id, None)
+
+
+def get_embedding_function(model_id: str = DEFAULT_MODEL_ID) -> CachedEmbeddingFunction:
+    '''
+    Returns the process-wide cached embedding function for a model. The handle is cheap to
+    create; the underlying model is loaded once, on the first embedding call.
+    '''
+    ef = _models.get(model_id)
+    if ef is None:
+        with _registry_lock:
+            ef = _models.get(model_id)
+            if ef is None:
+                ef = CachedEmbeddingFunction(
+                    LazyEmbeddingModel(model_id, _factories[model_id]), model_id=model_id, db_path=EMBEDDING_CACHE_PATH
+                )
+                _models[model_id] = ef
+    return ef
+
+
+def warm_up(model_ids: list = None):
+    '''Loads the given models (default: all registered) and runs one inference through each.'''
+    for model_id in model_ids or list(_factories):
+        get_embedding_function(model_id).base(['warm up'])
+
+
+def load_metrics() -> dict:
+    '''Returns load timings and cache counters for every model handle created so far.'''
+    metrics = {}
+    for model_id, ef in list(_models.items()):
+        metrics[model_id] = {
+            'loaded': ef.base.model is not None,
+            'load_seconds': ef.base.load_seconds,
+            'first_call_seconds': ef.base.first_call_seconds,
+            **ef.stats(),
+        }
+    return metrics
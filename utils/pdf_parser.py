@@ -0,0 +1,12 @@
+from langchain.document_loaders import PyPDFLoader
+
+
+def iter_pdf_pages(pdf_path: str):
+    '''Lazily yields the text of each page of a PDF.'''
+    for page in PyPDFLoader(pdf_path).lazy_load():
+        yield page.page_content
+
+
+def parse_pdf_pages(pdf_path: str) -> list:
+    '''Parses all page texts of a PDF. Kept importable on its own so it can run in a process pool.'''
+    return list(iter_pdf_pages(pdf_path))
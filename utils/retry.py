@@ -0,0 +1,51 @@
+import random
+import time
+import requests
+from utils.tracing import annotate
+
+# HTTP statuses worth trying again: timeouts, rate limits and server-side failures
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def is_transient(error: Exception) -> bool:
+    '''True for errors that may go away on their own: connection problems, timeouts, 429 and 5xx.'''
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in TRANSIENT_STATUS
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                              ConnectionError, TimeoutError))
+
+
+def describe_error(error: Exception) -> str:
+    '''Short description of an error; for HTTP errors only the status, since their URL can carry an API key.'''
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f"HTTP {error.response.status_code}"
+    if isinstance(error, requests.exceptions.RequestException):
+        return type(error).__name__
+    return f"{type(error).__name__}: {error}"
+
+
+def call_with_retry(fn, *args, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                    retry_if=is_transient, **kwargs):
+    '''
+    Calls fn(*args, **kwargs), retrying transient failures with exponential backoff and jitter.
+
+    Args:
+        attempts (int): Total number of calls, including the first.
+        base_delay (float): Delay before the first retry; doubled for every further one.
+        max_delay (float): Upper bound of a single delay.
+        retry_if (callable): Decides from the exception whether another attempt is worthwhile.
+
+    Returns:
+        What fn returns. The last exception is raised once the attempts are used up, and
+        errors rejected by retry_if are raised right away.
+    '''
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts or not retry_if(e):
+                raise
+            delay = min(base_delay * 2 ** (attempt - 1), max_delay) * random.uniform(0.5, 1.0)
+            annotate(retries=attempt)
+            print(f"⚠️ {getattr(fn, '__name__', 'call')} failed ({describe_error(e)}); retrying in {delay:.1f}s")
+            time.sleep(delay)
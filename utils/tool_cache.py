@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from utils.tracing import annotate
+
+
+class ToolResultCache:
+    '''
+    Persistent cache of tool results with a TTL per tool.
+
+    Results are stored in SQLite keyed by (tool, arguments). Concurrent calls with the same
+    key while one is in flight wait for that call instead of issuing their own request.
+    Only successful results are cached; exceptions are re-raised to every waiting caller.
+    '''
+    def __init__(self, db_path: str = './tool_cache/results.sqlite', default_ttl: float = 3600, ttls: dict = None):
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tool_results '
+            '(key TEXT PRIMARY KEY, tool TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(tool: str, args: dict) -> str:
+        payload = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha256(f'{tool}\x00{payload}'.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM tool_results WHERE key = ?', (key,)
+            ).fetchone()
+        if row and row[1] > time.time():
+            return json.loads(row[0])
+        return None
+
+    def set(self, tool: str, key: str, value):
+        expires_at = time.time() + self.ttls.get(tool, self.default_ttl)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO tool_results (key, tool, value, expires_at) VALUES (?, ?, ?, ?)',
+                (key, tool, json.dumps(value), expires_at)
+            )
+            self._conn.execute('DELETE FROM tool_results WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+
+    def get_or_call(self, tool: str, args: dict, fn):
+        '''Returns the cached result for (tool, args), or calls fn() once and caches what it returns.'''
+        key = self.make_key(tool, args)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            annotate(cache='hit')
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            self.coalesced += 1
+            annotate(cache='coalesced')
+            return future.result()
+
+        self.misses += 1
+        annotate(cache='miss')
+        try:
+            value = fn()
+            self.set(tool, key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced}
+
+
+# Shared cache for the network-backed tools; abstracts change rarely, web results more often
+tool_cache = ToolResultCache(db_path=os.getenv('TOOL_CACHE_PATH', './tool_cache/results.sqlite'), ttls={
+    'fetch_arxiv': 7 * 24 * 3600,
+    'web_search': 24 * 3600,
+})
@@ -0,0 +1,189 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+# Optional JSON-lines file every finished trace is appended to (OpenTelemetry-style records)
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH')
+
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    '''A timed operation with attributes, nested under the span that was active when it started.'''
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self):
+        self.duration = time.perf_counter() - self._start
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start_ns': self.start_ns,
+            'duration_ms': self.duration * 1000 if self.duration is not None else None,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+    def to_otel(self) -> dict:
+        '''Returns the span in the OTLP/JSON span layout.'''
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id or '',
+            'name': self.name,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [{'key': key, 'value': _otel_value(value)} for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+
+
+def _otel_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Trace:
+    '''Collects the spans of one run (e.g. one navigator request), from any thread.'''
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> list:
+        '''Per span name: count, total and max milliseconds, slowest first.'''
+        totals = {}
+        with self._lock:
+            spans = [s for s in self.spans if s.duration is not None]
+        for span in spans:
+            entry = totals.setdefault(span.name, {'name': span.name, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += span.duration * 1000
+            entry['max_ms'] = max(entry['max_ms'], span.duration * 1000)
+        return sorted(totals.values(), key=lambda e: e['total_ms'], reverse=True)
+
+    def to_json(self) -> list:
+        with self._lock:
+            return [span.to_dict() for span in self.spans]
+
+    def to_otel(self) -> dict:
+        '''Returns the trace as an OTLP/JSON ExportTraceServiceRequest body.'''
+        with self._lock:
+            spans = [span.to_otel() for span in self.spans]
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'ai-research-assistant'}}]},
+                'scopeSpans': [{'scope': {'name': 'utils.tracing'}, 'spans': spans}],
+            }]
+        }
+
+    def export(self, path: str = None):
+        '''Appends the trace, as one OTLP/JSON line, to `path` (default: TRACE_EXPORT_PATH).'''
+        path = path or TRACE_EXPORT_PATH
+        if not path:
+            return
+        line = json.dumps(self.to_otel())
+        with _export_lock:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(line + '\n')
+
+
+@contextmanager
+def start_trace(name: str):
+    '''Makes a new Trace current for the block; spans started inside it are collected there.'''
+    trace = Trace(name)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        trace.export()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    '''
+    Times the block as a span of the current trace. Outside a trace this does nothing
+    but still yields a Span, so instrumented code never needs to check.
+    '''
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(name, trace.trace_id if trace else '', parent.span_id if parent else None, attributes)
+    if trace is None:
+        yield current
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+        trace.add(current)
+
+
+def annotate(**attributes):
+    '''Adds attributes (e.g. cache_hit=True) to the currently active span, if any.'''
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def traced(name: str):
+    '''Decorator form of span().'''
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_trace() -> Trace:
+    return _current_trace.get()
+
+
+def submit(executor, fn, *args, **kwargs):
+    '''Submits to a thread pool so the task runs inside the caller's trace and span.'''
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
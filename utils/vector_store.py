@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import threading
+import numpy as np
+
+# Popcount of every byte value, for Hamming distances between packed binary codes
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _reserve(buffer: np.ndarray, rows: int) -> np.ndarray:
+    '''Returns `buffer` or, if it has fewer than `rows` rows, a copy with at least twice the capacity.'''
+    if len(buffer) >= rows:
+        return buffer
+    grown = np.zeros((max(rows, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
+
+
+def hnsw_metadata(space: str = 'l2', m: int = None, construction_ef: int = None, search_ef: int = None) -> dict:
+    '''Builds the collection metadata that configures Chroma's HNSW index (applied when a collection is created).'''
+    metadata = {'hnsw:space': space}
+    if m is not None:
+        metadata['hnsw:M'] = m
+    if construction_ef is not None:
+        metadata['hnsw:construction_ef'] = construction_ef
+    if search_ef is not None:
+        metadata['hnsw:search_ef'] = search_ef
+    return metadata
+
+
+def hnsw_params_from_env() -> dict:
+    '''HNSW settings from HNSW_SPACE, HNSW_M, HNSW_CONSTRUCTION_EF and HNSW_SEARCH_EF; None if none is set.'''
+    params = {
+        'm': os.getenv('HNSW_M'),
+        'construction_ef': os.getenv('HNSW_CONSTRUCTION_EF'),
+        'search_ef': os.getenv('HNSW_SEARCH_EF'),
+    }
+    params = {key: int(value) for key, value in params.items() if value}
+    if os.getenv('HNSW_SPACE'):
+        params['space'] = os.getenv('HNSW_SPACE')
+    return params or None
+
+
+class NumpyVectorStore:
+    '''
+    Local vector store with the subset of the Chroma collection API the project uses
+    (upsert, add, query, get, delete, count), so it can be swapped in for a collection.
+
+    Vectors are L2-normalized and searched by cosine distance. With quantization='int8' or
+    'binary', only the compact codes are kept in memory and scanned; the best
+    `rerank_factor * n_results` candidates are then re-ranked with the full float32 vectors,
+    which stay on disk behind a memory map. quantization=None scans the float vectors directly.
+    A store keeps the quantization it was created with; reopening it with another one prints a
+    warning and uses the stored one.
+
+    The vector files are written before the rows are committed to SQLite, and only the first
+    COUNT(rows) vectors of each file are read, so a write interrupted by a crash or an error
+    leaves the store readable with the rows committed before it.
+    '''
+    def __init__(self, path: str, quantization: str = 'int8', rerank_factor: int = 4):
+        if quantization not in (None, 'int8', 'binary'):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.path = path
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+
+        self._conn = sqlite3.connect(os.path.join(path, 'rows.sqlite'), check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, '
+            'metadata TEXT, document TEXT, deleted INTEGER NOT NULL DEFAULT 0)'
+        )
+        self._conn.execute('CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)')
+        self._conn.commit()
+        dim = self._conn.execute("SELECT value FROM info WHERE key = 'dim'").fetchone()
+        self.dim = int(dim[0]) if dim else None
+        if self.dim is not None:
+            self._check_quantization()
+        self._n = self._conn.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+        self._load()
+
+    def _check_quantization(self):
+        '''Switches to the quantization the stored codes were written with, if it differs.'''
+        stored = self._conn.execute("SELECT value FROM info WHERE key = 'quantization'").fetchone()
+        if stored:
+            stored = None if stored[0] == 'none' else stored[0]
+        else:
+            # Stores written before the quantization was recorded: tell it from the code files
+            stored = None
+            if os.path.exists(self._file('codes.i8')):
+                stored = 'int8'
+            elif os.path.exists(self._file('codes.bin')):
+                stored = 'binary'
+            self._save_quantization(stored)
+            self._conn.commit()
+        if stored != self.quantization:
+            print(f"⚠️ Vector store {self.path} was built with quantization={stored}, "
+                  f"not {self.quantization}; using {stored}.")
+            self.quantization = stored
+
+    def _save_quantization(self, quantization: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO info (key, value) VALUES ('quantization', ?)", (quantization or 'none',)
+        )
+
+    # ---- storage -----------------------------------------------------------------------
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        '''Loads the quantized codes into memory and maps the float vectors from disk.'''
+        self._floats = None
+        self._codes = None
+        self._scales = None
+        # Growable buffers behind _deleted/_codes/_scales, which are views of their first _n rows
+        self._buffers = {'deleted': np.zeros(self._n, dtype=bool)}
+        for (row,) in self._conn.execute('SELECT row FROM rows WHERE deleted = 1'):
+            self._buffers['deleted'][row] = True
+        if self.dim and self._n:
+            # The files may hold rows beyond _n that were written but never committed
+            if self.quantization == 'int8':
+                self._buffers['codes'] = np.fromfile(
+                    self._file('codes.i8'), dtype=np.int8, count=self._n * self.dim
+                ).reshape(self._n, self.dim)
+                self._buffers['scales'] = np.fromfile(self._file('scales.f32'), dtype=np.float32, count=self._n)
+            elif self.quantization == 'binary':
+                row_bytes = (self.dim + 7) // 8
+                self._buffers['codes'] = np.fromfile(
+                    self._file('codes.bin'), dtype=np.uint8, count=self._n * row_bytes
+                ).reshape(self._n, row_bytes)
+        self._update_views()
+
+    def _update_views(self):
+        self._deleted = self._buffers['deleted'][:self._n]
+        self._codes = self._buffers['codes'][:self._n] if 'codes' in self._buffers else None
+        self._scales = self._buffers['scales'][:self._n] if 'scales' in self._buffers else None
+        if self.dim and self._n:
+            # Re-mapping is cheap: nothing is read until rows are accessed
+            self._floats = np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(self._n, self.dim))
+
+    def _apply_rows(self, rows: np.ndarray, codes, scales):
+        '''Brings the in-memory codes up to date after _write_rows, without re-reading the files.'''
+        updates = {'deleted': False, 'codes': codes, 'scales': scales}
+        for name, values in updates.items():
+            if values is None:
+                continue
+            if name not in self._buffers:
+                self._buffers[name] = np.zeros((0,) + np.shape(values)[1:], dtype=np.asarray(values).dtype)
+            self._buffers[name] = _reserve(self._buffers[name], self._n)
+            self._buffers[name][rows] = values
+        self._update_views()
+
+    def _quantize(self, vectors: np.ndarray):
+        if self.quantization == 'int8':
+            scales = np.abs(vectors).max(axis=1) / 127.0 + 1e-12
+            return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        if self.quantization == 'binary':
+            return np.packbits(vectors > 0, axis=1), None
+        return None, None
+
+    def _write_rows(self, rows: np.ndarray, vectors: np.ndarray) -> tuple:
+        '''
+        Writes vectors (and their codes) at the given row numbers, extending the files as needed.
+        Returns the (codes, scales) that were written.
+        '''
+        codes, scales = self._quantize(vectors)
+        targets = [('vectors.f32', vectors)]
+        if self.quantization == 'int8':
+            targets += [('codes.i8', codes), ('scales.f32', scales)]
+        elif self.quantization == 'binary':
+            targets += [('codes.bin', codes)]
+        for name, data in targets:
+            data = np.ascontiguousarray(data)
+            row_bytes = data[0].nbytes if data.ndim > 1 else data.itemsize
+            with open(self._file(name), 'r+b' if os.path.exists(self._file(name)) else 'w+b') as file:
+                for row, values in zip(rows, data):
+                    file.seek(int(row) * row_bytes)
+                    file.write(values.tobytes())
+        return codes, scales
+
+    # ---- collection API ----------------------------------------------------------------
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._n - self._deleted.sum())
+
+    def add(self, ids, embeddings, metadatas=None, documents=None):
+        self.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None):
+        vectors = np.array(embeddings, dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        metadatas = metadatas or [None] * len(ids)
+        documents = documents or [None] * len(ids)
+        with self._lock:
+            n, dim = self._n, self.dim
+            try:
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                    self._conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('dim', ?)", (str(self.dim),))
+                    self._save_quantization(self.quantization)
+                rows = []
+                for doc_id, metadata, document in zip(ids, metadatas, documents):
+                    found = self._conn.execute('SELECT row FROM rows WHERE id = ?', (doc_id,)).fetchone()
+                    if found:
+                        row = found[0]
+                        self._conn.execute(
+                            'UPDATE rows SET metadata = ?, document = ?, deleted = 0 WHERE row = ?',
+                            (json.dumps(metadata), document, row)
+                        )
+                    else:
+                        row = self._n
+                        self._n += 1
+                        self._conn.execute(
+                            'INSERT INTO rows (row, id, metadata, document) VALUES (?, ?, ?, ?)',
+                            (row, doc_id, json.dumps(metadata), document)
+                        )
+                    rows.append(row)
+                rows = np.asarray(rows)
+                codes, scales = self._write_rows(rows, vectors)
+                self._conn.commit()
+            except BaseException:
+                # Nothing of a failed upsert is committed; vectors it wrote past row n are ignored
+                self._conn.rollback()
+                self._n, self.dim = n, dim
+                raise
+            self._apply_rows(rows, codes, scales)
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            rows = self._matching_rows(ids=ids, where=where)
+            self._conn.executemany('UPDATE rows SET deleted = 1 WHERE row = ?', [(int(r),) for r in rows])
+            self._conn.commit()
+            self._deleted[rows] = True
+
+    def _matching_rows(self, ids=None, where=None) -> np.ndarray:
+        '''Returns the live row numbers matching an id list and/or an equality filter like {"paper_id": x}.'''
+        sql, params = 'SELECT row FROM rows WHERE deleted = 0', []
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids))})"
+            params += list(ids)
+        for key, value in (where or {}).items():
+            if key.startswith('$') or isinstance(value, dict):
+                raise ValueError(f"Only equality filters are supported, got {where}")
+            sql += ' AND json_extract(metadata, ?) = ?'
+            params += [f'$.{key}', value]
+        return np.array([row for (row,) in self._conn.execute(sql, params)], dtype=np.int64)
+
+    def _records(self, rows) -> dict:
+        found = {}
+        for start in range(0, len(rows), 500):
+            batch = [int(r) for r in rows[start:start + 500]]
+            placeholders = ','.join('?' * len(batch))
+            for row, doc_id, metadata, document in self._conn.execute(
+                f'SELECT row, id, metadata, document FROM rows WHERE row IN ({placeholders})', batch
+            ):
+                found[row] = (doc_id, json.loads(metadata) if metadata else None, document)
+        return found
+
+    def get(self, ids=None, where=None, include=('metadatas', 'documents'), limit=None, offset=None):
+        with self._lock:
+            rows = np.sort(self._matching_rows(ids=ids, where=where))
+            rows = rows[(offset or 0):(offset or 0) + limit if limit else None]
+            records = self._records(rows)
+            result = {'ids': [records[r][0] for r in rows]}
+            if 'metadatas' in include:
+                result['metadatas'] = [records[r][1] for r in rows]
+            if 'documents' in include:
+                result['documents'] = [records[r][2] for r in rows]
+            if 'embeddings' in include:
+                result['embeddings'] = [np.array(self._floats[r]) for r in rows]
+            return result
+
+    def _search(self, query: np.ndarray, candidates: np.ndarray, n_results: int) -> tuple:
+        '''Returns (rows, cosine distances) of the nearest candidates to one normalized query.'''
+        if self.quantization is None:
+            shortlist = candidates
+        else:
+            if self.quantization == 'int8':
+                approx = (self._codes[candidates] @ query) * self._scales[candidates]
+            else:
+                query_bits = np.packbits(query > 0)
+                approx = -_POPCOUNT[np.bitwise_xor(self._codes[candidates], query_bits)].sum(axis=1, dtype=np.int32)
+            keep = min(len(candidates), n_results * self.rerank_factor)
+            shortlist = candidates[np.argpartition(-approx, keep - 1)[:keep]]
+        # Float re-ranking of the shortlist
+        scores = np.asarray(self._floats[shortlist]) @ query
+        order = np.argsort(-scores)[:n_results]
+        return shortlist[order], 1.0 - scores[order]
+
+    def query(self, query_embeddings, n_results=10, where=None, include=('metadatas', 'documents', 'distances')):
+        queries = np.array(query_embeddings, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+        result = {'ids': [], 'distances': [], 'metadatas': [], 'documents': [], 'embeddings': []}
+        with self._lock:
+            candidates = self._matching_rows(where=where) if where else np.flatnonzero(~self._deleted)
+            for query in queries:
+                if not len(candidates):
+                    rows, distances = np.array([], dtype=np.int64), np.array([])
+                else:
+                    rows, distances = self._search(query, candidates, n_results)
+                records = self._records(rows)
+                result['ids'].append([records[r][0] for r in rows])
+                result['distances'].append([float(d) for d in distances])
+                result['metadatas'].append([records[r][1] for r in rows])
+                result['documents'].append([records[r][2] for r in rows])
+                if 'embeddings' in include:
+                    result['embeddings'].append([np.array(self._floats[r]) for r in rows])
+        return {key: value for key, value in result.items() if key == 'ids' or key in include}